@@ -0,0 +1,73 @@
+"""Alembic environment.
+
+Migrations run against DATABASE_URL, or against the connection passed in
+by app.core.migrations when the application upgrades its own database.
+SQLite cannot alter most of a table in place, so migrations run in batch
+mode there (copy, alter, swap).
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from app.core.database import Base, DATABASE_URL
+from app.core.search import SEARCH_INDEXES
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    """Leave the full-text search tables, managed by app.core.search, to it."""
+    if type_ == "table":
+        return not any(
+            name == index.name or name.startswith(f"{index.name}_") for index in SEARCH_INDEXES
+        )
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL instead of running it (alembic upgrade --sql)."""
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_with(connection)
+        return
+    engine = create_engine(DATABASE_URL)
+    try:
+        with engine.connect() as connection:
+            _run_with(connection)
+    finally:
+        engine.dispose()
+
+
+def _run_with(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=connection.dialect.name == "sqlite",
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,133 @@
+"""Initial schema
+
+The tables as first created by Base.metadata.create_all: branches, users,
+clients, insurance policies and audit logs, with their single-column indexes.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "branches",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("code", sa.String(length=10), nullable=False),
+        sa.Column("address", sa.String(), nullable=False),
+        sa.Column("phone", sa.String(length=20), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("code"),
+    )
+    op.create_index("ix_branches_id", "branches", ["id"])
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("username", sa.String(length=50), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("password_hash", sa.String(length=255), nullable=False),
+        sa.Column("role", sa.String(length=20), nullable=False),
+        sa.Column("branch_id", sa.Integer(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(["branch_id"], ["branches.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "clients",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("branch_id", sa.Integer(), nullable=False),
+        sa.Column("first_name", sa.String(length=50), nullable=False),
+        sa.Column("last_name", sa.String(length=50), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("phone", sa.String(length=20), nullable=False),
+        sa.Column("address", sa.String(), nullable=False),
+        sa.Column("date_of_birth", sa.Date(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(["branch_id"], ["branches.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_clients_id", "clients", ["id"])
+    op.create_index("ix_clients_branch_id", "clients", ["branch_id"])
+    op.create_index("ix_clients_email", "clients", ["email"], unique=True)
+
+    op.create_table(
+        "insurance_policies",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("policy_number", sa.String(length=50), nullable=False),
+        sa.Column("client_id", sa.Integer(), nullable=False),
+        sa.Column("branch_id", sa.Integer(), nullable=False),
+        sa.Column("type", sa.String(length=100), nullable=False),
+        sa.Column("coverage", sa.Text(), nullable=False),
+        sa.Column("premium", sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("end_date", sa.Date(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.CheckConstraint("end_date > start_date", name="check_end_date_after_start"),
+        sa.CheckConstraint(
+            "status IN ('active', 'pending', 'cancelled', 'expired')", name="check_valid_status"
+        ),
+        sa.CheckConstraint("premium > 0", name="check_positive_premium"),
+        sa.ForeignKeyConstraint(["branch_id"], ["branches.id"]),
+        sa.ForeignKeyConstraint(["client_id"], ["clients.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_insurance_policies_id", "insurance_policies", ["id"])
+    op.create_index(
+        "ix_insurance_policies_policy_number", "insurance_policies", ["policy_number"], unique=True
+    )
+    op.create_index("ix_insurance_policies_client_id", "insurance_policies", ["client_id"])
+    op.create_index("ix_insurance_policies_branch_id", "insurance_policies", ["branch_id"])
+    op.create_index("ix_insurance_policies_start_date", "insurance_policies", ["start_date"])
+    op.create_index("ix_insurance_policies_end_date", "insurance_policies", ["end_date"])
+
+    op.create_table(
+        "audit_logs",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("action", sa.String(length=20), nullable=False),
+        sa.Column("resource_type", sa.String(length=50), nullable=False),
+        sa.Column("resource_id", sa.Integer(), nullable=False),
+        sa.Column("old_values", sa.JSON(), nullable=True),
+        sa.Column("new_values", sa.JSON(), nullable=True),
+        sa.Column("timestamp", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("ip_address", sa.String(length=45), nullable=True),
+        sa.Column("user_agent", sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_audit_logs_id", "audit_logs", ["id"])
+    op.create_index("ix_audit_logs_user_id", "audit_logs", ["user_id"])
+    op.create_index("ix_audit_logs_action", "audit_logs", ["action"])
+    op.create_index("ix_audit_logs_resource_type", "audit_logs", ["resource_type"])
+    op.create_index("ix_audit_logs_resource_id", "audit_logs", ["resource_id"])
+    op.create_index("ix_audit_logs_timestamp", "audit_logs", ["timestamp"])
+
+
+def downgrade() -> None:
+    op.drop_table("audit_logs")
+    op.drop_table("insurance_policies")
+    op.drop_table("clients")
+    op.drop_table("users")
+    op.drop_table("branches")
@@ -0,0 +1,80 @@
+"""Composite and partial indexes for the list and expiry queries
+
+Replaces single-column indexes with composites led by the same column, so
+no query loses its index and writes maintain fewer indexes overall:
+
+- clients, policies: (branch_id, id) for branch-scoped lists in keyset order
+- policies: (branch_id, status, id) and (status, id) for the status
+  filter within a branch and alone (admins), in keyset order
+- policies: (end_date, id) limited to active/pending rows, for the expiry job
+- audit logs: (user_id | action | resource_type, resource_id, timestamp)
+  for the filtered lists, most recent first
+
+`python -m app.core.query_plans check` verifies each query uses them.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 09:30:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# Literal, like the query's term, so SQLite can use the partial index
+EXPIRABLE = sa.text("status IN ('active', 'pending')")
+
+
+def upgrade() -> None:
+    op.create_index("ix_clients_branch_id_id", "clients", ["branch_id", "id"])
+    op.drop_index("ix_clients_branch_id", table_name="clients")
+
+    op.create_index("ix_insurance_policies_branch_id_id", "insurance_policies", ["branch_id", "id"])
+    op.create_index(
+        "ix_insurance_policies_branch_id_status_id", "insurance_policies", ["branch_id", "status", "id"]
+    )
+    op.create_index("ix_insurance_policies_status_id", "insurance_policies", ["status", "id"])
+    op.create_index(
+        "ix_insurance_policies_expiry_due",
+        "insurance_policies",
+        ["end_date", "id"],
+        sqlite_where=EXPIRABLE,
+        postgresql_where=EXPIRABLE,
+    )
+    op.drop_index("ix_insurance_policies_branch_id", table_name="insurance_policies")
+    op.drop_index("ix_insurance_policies_end_date", table_name="insurance_policies")
+
+    op.create_index("ix_audit_logs_user_id_timestamp", "audit_logs", ["user_id", "timestamp"])
+    op.create_index("ix_audit_logs_action_timestamp", "audit_logs", ["action", "timestamp"])
+    op.create_index(
+        "ix_audit_logs_resource_timestamp", "audit_logs", ["resource_type", "resource_id", "timestamp"]
+    )
+    op.drop_index("ix_audit_logs_user_id", table_name="audit_logs")
+    op.drop_index("ix_audit_logs_action", table_name="audit_logs")
+    op.drop_index("ix_audit_logs_resource_type", table_name="audit_logs")
+    op.drop_index("ix_audit_logs_resource_id", table_name="audit_logs")
+
+
+def downgrade() -> None:
+    op.create_index("ix_audit_logs_resource_id", "audit_logs", ["resource_id"])
+    op.create_index("ix_audit_logs_resource_type", "audit_logs", ["resource_type"])
+    op.create_index("ix_audit_logs_action", "audit_logs", ["action"])
+    op.create_index("ix_audit_logs_user_id", "audit_logs", ["user_id"])
+    op.drop_index("ix_audit_logs_resource_timestamp", table_name="audit_logs")
+    op.drop_index("ix_audit_logs_action_timestamp", table_name="audit_logs")
+    op.drop_index("ix_audit_logs_user_id_timestamp", table_name="audit_logs")
+
+    op.create_index("ix_insurance_policies_end_date", "insurance_policies", ["end_date"])
+    op.create_index("ix_insurance_policies_branch_id", "insurance_policies", ["branch_id"])
+    op.drop_index("ix_insurance_policies_expiry_due", table_name="insurance_policies")
+    op.drop_index("ix_insurance_policies_status_id", table_name="insurance_policies")
+    op.drop_index("ix_insurance_policies_branch_id_status_id", table_name="insurance_policies")
+    op.drop_index("ix_insurance_policies_branch_id_id", table_name="insurance_policies")
+
+    op.create_index("ix_clients_branch_id", "clients", ["branch_id"])
+    op.drop_index("ix_clients_branch_id_id", table_name="clients")
@@ -1,29 +1,42 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, or_
+from datetime import datetime
 
-from app.core.database import get_db
-from app.models.user import User
-from app.core.security import get_current_user, ROLE_ADMIN
+from app.core.database import use_replica
+from app.core.security import get_current_user, get_read_db, Principal, ROLE_ADMIN
 from app.core.audit import AuditLog
+from app.core.pagination import (
+    decode_cursor,
+    cursor_value,
+    keyset_page,
+    keyset_meta,
+    fetch_with_total,
+    fetch_without_total,
+    estimate_count,
+    offset_meta,
+    TOTAL_EXACT,
+    TOTAL_ESTIMATE
+)
+from app.core.serialization import PageRenderer, json_response, parse_fields
+from app.core.export import (
+    stream_query, encode_rows, export_response, EXPORT_CSV, EXPORT_FORMAT_PATTERN
+)
 from app.schemas.audit import AuditLogResponse, AuditLogList
 
 router = APIRouter()
 
-@router.get("/", response_model=AuditLogList)
-def read_audit_logs(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(20, ge=1, le=100),
-    user_id: Optional[int] = None,
-    action: Optional[str] = None,
-    resource_type: Optional[str] = None,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Get audit logs (ADMIN only)."""
+audit_page = PageRenderer(AuditLogList)
+
+# Fields the list can return: the AuditLogResponse fields. The old/new value
+# snapshots are the bulk of each row, so they are left out unless asked for.
+AUDIT_LIST_FIELDS = tuple(AuditLogResponse.model_fields)
+AUDIT_DEFAULT_FIELDS = tuple(
+    field for field in AUDIT_LIST_FIELDS if field not in ("old_values", "new_values")
+)
+
+def require_admin(current_user: Principal) -> None:
     # Only ADMIN users can access audit logs
     if current_user.role != ROLE_ADMIN:
         raise HTTPException(
@@ -31,34 +44,151 @@ def read_audit_logs(
             detail="Only administrators can access audit logs"
         )
 
-    query = db.query(AuditLog)
-
-    # Apply filters
+def filter_audit_logs(
+    query,
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    resource_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+):
+    """Apply the audit log list filters to a query."""
     if user_id:
         query = query.filter(AuditLog.user_id == user_id)
     if action:
         query = query.filter(AuditLog.action == action)
     if resource_type:
         query = query.filter(AuditLog.resource_type == resource_type)
+    if resource_id:
+        query = query.filter(AuditLog.resource_id == resource_id)
     if start_date:
         query = query.filter(AuditLog.timestamp >= start_date)
     if end_date:
         query = query.filter(AuditLog.timestamp <= end_date)
+    return query
+
+@router.get("/", response_model=AuditLogList)
+def read_audit_logs(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    resource_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    cursor: Optional[str] = Query(
+        None,
+        description="Opaque keyset cursor from meta.next_cursor; pass an empty value to start"
+    ),
+    include_total: bool = True,
+    total: str = Query(TOTAL_EXACT, regex="^(exact|estimate)$"),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated response fields (sparse fieldset); id is always included"
+    ),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Get audit logs (ADMIN only)."""
+    require_admin(current_user)
+
+    selected = parse_fields(fields, AUDIT_LIST_FIELDS, AUDIT_DEFAULT_FIELDS)
+    columns = [getattr(AuditLog, field) for field in selected]
+    if "timestamp" not in selected:
+        # Needed for the keyset cursor even when not returned
+        columns.append(AuditLog.timestamp)
+    query = filter_audit_logs(
+        db.query(*columns), user_id, action, resource_type, resource_id, start_date, end_date
+    )
+
+    if cursor is not None:
+        # Keyset pagination on (timestamp, id), most recent first
+        values = decode_cursor(cursor)
+        if values is not None:
+            after_timestamp = cursor_value(values, "timestamp", datetime.fromisoformat)
+            after_id = cursor_value(values, "id")
+            query = query.filter(
+                or_(
+                    AuditLog.timestamp < after_timestamp,
+                    and_(AuditLog.timestamp == after_timestamp, AuditLog.id < after_id)
+                )
+            )
+        rows = query.order_by(
+            AuditLog.timestamp.desc(), AuditLog.id.desc()
+        ).limit(limit + 1).all()
+        logs, next_cursor = keyset_page(
+            rows, limit, lambda log: {"timestamp": log.timestamp.isoformat(), "id": log.id}
+        )
+        return json_response(audit_page.render(logs, keyset_meta(limit, next_cursor), selected))
 
     # Order by timestamp descending (most recent first)
-    query = query.order_by(AuditLog.timestamp.desc())
+    ordered = query.order_by(AuditLog.timestamp.desc())
 
-    total_count = query.count()
-    logs = query.offset(skip).limit(limit).all()
+    if not include_total:
+        logs, has_more = fetch_without_total(ordered, skip, limit)
+        meta = offset_meta(skip, limit, None, has_more=has_more)
+    elif total == TOTAL_ESTIMATE:
+        logs = ordered.offset(skip).limit(limit).all()
+        signature = ("audit_logs", user_id, action, resource_type, resource_id, start_date, end_date)
+        total_count = estimate_count(signature, query.count)
+        meta = offset_meta(skip, limit, total_count, estimated=True)
+    else:
+        logs, total_count = fetch_with_total(ordered, skip, limit)
+        meta = offset_meta(skip, limit, total_count)
 
-    total_pages = (total_count + limit - 1) // limit if limit > 0 else 0
+    return json_response(audit_page.render(logs, meta, selected))
 
-    return AuditLogList(
-        data=[AuditLogResponse.model_validate(log) for log in logs],
-        meta={
-            "page": (skip // limit) + 1 if limit > 0 else 1,
-            "per_page": limit,
-            "total": total_count,
-            "total_pages": total_pages
-        }
+@router.get("/export")
+def export_audit_logs(
+    export_format: str = Query(EXPORT_CSV, alias="format", regex=EXPORT_FORMAT_PATTERN),
+    gzip: bool = False,
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    resource_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated columns to export; id is always included"
+    ),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Stream audit logs matching the list filters as CSV or NDJSON (ADMIN only).
+
+    Most recent first, like the list. Exports include old/new values unless
+    `fields` says otherwise.
+    """
+    require_admin(current_user)
+    selected = parse_fields(fields, AUDIT_LIST_FIELDS, AUDIT_LIST_FIELDS)
+    rows = stream_query(
+        lambda db: filter_audit_logs(
+            db.query(*[getattr(AuditLog, field) for field in selected]),
+            user_id, action, resource_type, resource_id, start_date, end_date
+        ).order_by(AuditLog.timestamp.desc(), AuditLog.id.desc()),
+        replica=use_replica(current_user.id)
     )
+    return export_response(
+        encode_rows(rows, AuditLogResponse, selected, export_format),
+        export_format,
+        "audit-logs",
+        compress=gzip
+    )
+
+@router.get("/{log_id}", response_model=AuditLogResponse)
+def read_audit_log(
+    log_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Get one audit log with its old/new values (ADMIN only)."""
+    require_admin(current_user)
+    log = db.query(AuditLog).filter(AuditLog.id == log_id).first()
+    if log is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Audit log not found"
+        )
+    return AuditLogResponse.model_validate(log)
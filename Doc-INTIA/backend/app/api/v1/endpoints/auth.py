@@ -1,81 +1,197 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-import bcrypt
+from starlette.concurrency import run_in_threadpool
 
+from app.core.audit import log_action, ACTION_LOGIN, ACTION_LOGOUT, RESOURCE_USER
 from app.core.database import get_db
 from app.models.user import User
-from app.core.security import create_access_token, get_current_user
+from app.core.passwords import (
+    verify_password_async,
+    hash_password_async,
+    needs_rehash,
+    login_admission
+)
+from app.core.security import (
+    create_access_token,
+    get_current_user,
+    get_refresh_token_from_request,
+    issue_refresh_token,
+    rotate_refresh_token,
+    revoke_refresh_token,
+    revoke_user_tokens,
+    principal_claims,
+    wants_refresh_token_in_body,
+    Principal,
+    ACCESS_TOKEN_COOKIE,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    REFRESH_TOKEN_COOKIE,
+    REFRESH_TOKEN_COOKIE_PATH,
+    REFRESH_TOKEN_EXPIRE_DAYS
+)
 from app.schemas.user import UserResponse
 
 router = APIRouter()
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against a hash using bcrypt."""
-    try:
-        return bcrypt.checkpw(
-            plain_password.encode('utf-8'),
-            hashed_password.encode('utf-8')
-        )
-    except Exception:
-        return False
+def log_session_event(db: Session, request: Request, user_id: int, action: str) -> None:
+    """Audit a login or logout; standalone events go through the background writer."""
+    log_action(
+        db_session=db,
+        user_id=user_id,
+        action=action,
+        resource_type=RESOURCE_USER,
+        resource_id=user_id,
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent")
+    )
+
+
+def token_response(request: Request, access_token: str, refresh_token: str) -> dict:
+    """Token response body; the refresh token is only included on request."""
+    body = {"access_token": access_token, "token_type": "bearer"}
+    if wants_refresh_token_in_body(request):
+        body["refresh_token"] = refresh_token
+    return body
+
+
+def set_auth_cookies(response: Response, access_token: str, refresh_token: str) -> None:
+    """Set the HTTP-only access and refresh token cookies."""
+    response.set_cookie(
+        key=ACCESS_TOKEN_COOKIE,
+        value=access_token,
+        httponly=True,
+        secure=False,  # Set to True in production with HTTPS
+        samesite="lax",
+        max_age=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        path="/"
+    )
+    response.set_cookie(
+        key=REFRESH_TOKEN_COOKIE,
+        value=refresh_token,
+        httponly=True,
+        secure=False,  # Set to True in production with HTTPS
+        samesite="lax",
+        max_age=REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
+        path=REFRESH_TOKEN_COOKIE_PATH
+    )
 
 
 @router.post("/login")
 async def login(
+    request: Request,
     response: Response,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
     """Login endpoint that sets HTTP-only cookie."""
-    user = db.query(User).filter(User.username == form_data.username).first()
-
-    if not user or not verify_password(form_data.password, user.password_hash):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password",
-            headers={"WWW-Authenticate": "Bearer"},
+    # Blocking work (DB, bcrypt) runs off the event loop, and at most
+    # LOGIN_MAX_CONCURRENCY logins are verified at once
+    async with login_admission.slot():
+        user = await run_in_threadpool(
+            lambda: db.query(User).filter(User.username == form_data.username).first()
         )
 
+        if not user or not await verify_password_async(form_data.password, user.password_hash):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Incorrect username or password",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        # Upgrade hashes made with a different bcrypt cost
+        if needs_rehash(user.password_hash):
+            user.password_hash = await hash_password_async(form_data.password)
+            await run_in_threadpool(db.commit)
+
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user"
         )
 
-    # Create access token
-    access_token = create_access_token(data={"sub": user.username})
+    # Create access and refresh tokens
+    access_token = create_access_token(data=principal_claims(user))
+    refresh_token = await run_in_threadpool(issue_refresh_token, db, user)
+    await run_in_threadpool(log_session_event, db, request, user.id, ACTION_LOGIN)
 
-    # Set HTTP-only cookie
-    response.set_cookie(
-        key="token",
-        value=access_token,
-        httponly=True,
-        secure=False,  # Set to True in production with HTTPS
-        samesite="lax",
-        max_age=30 * 60,  # 30 minutes
-        path="/"
-    )
+    # Set HTTP-only cookies
+    set_auth_cookies(response, access_token, refresh_token)
 
     return {
-        "access_token": access_token,
-        "token_type": "bearer",
+        **token_response(request, access_token, refresh_token),
         "user": UserResponse.model_validate(user)
     }
 
 
+@router.post("/refresh")
+def refresh(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    """Rotate the refresh token and issue a new access token, without a password."""
+    token = get_refresh_token_from_request(request)
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    user, refresh_token = rotate_refresh_token(db, token)
+    access_token = create_access_token(data=principal_claims(user))
+    set_auth_cookies(response, access_token, refresh_token)
+
+    return token_response(request, access_token, refresh_token)
+
+
 @router.post("/logout")
-async def logout(response: Response):
-    """Logout endpoint that clears the cookie."""
-    response.delete_cookie(key="token", path="/")
+def logout(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    """Logout endpoint that revokes the refresh token and clears the cookies."""
+    token = get_refresh_token_from_request(request)
+    if token:
+        revoke_refresh_token(db, token)
+    response.delete_cookie(key=ACCESS_TOKEN_COOKIE, path="/")
+    response.delete_cookie(key=REFRESH_TOKEN_COOKIE, path=REFRESH_TOKEN_COOKIE_PATH)
     return {"message": "Successfully logged out"}
 
 
+@router.post("/logout-all")
+def logout_all(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Sign out everywhere: revoke every access and refresh token of the current user."""
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    revoke_user_tokens(db, user)
+    log_session_event(db, request, user.id, ACTION_LOGOUT)
+    response.delete_cookie(key=ACCESS_TOKEN_COOKIE, path="/")
+    response.delete_cookie(key=REFRESH_TOKEN_COOKIE, path=REFRESH_TOKEN_COOKIE_PATH)
+    return {"message": "Successfully logged out of all sessions"}
+
+
 @router.get("/me", response_model=UserResponse)
-async def get_me(
-    current_user: User = Depends(get_current_user)
+def get_me(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get current authenticated user."""
-    return UserResponse.model_validate(current_user)
-
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return UserResponse.model_validate(user)
@@ -1,35 +1,34 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 
-from app.core.database import get_db
-from app.models.user import User
-from app.models.branch import Branch
-from app.core.security import get_current_user
+from app.core.security import get_current_user, Principal
+from app.core.http_cache import cached_response
+from app.core.reference import branch_cache, BRANCH_CACHE_CONTROL
 from app.schemas.branch import BranchResponse
 
 router = APIRouter()
 
 @router.get("/", response_model=List[BranchResponse])
-def read_branches(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def read_branches(
+    request: Request,
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Get all branches."""
-    branches = db.query(Branch).all()
-    return [BranchResponse.model_validate(branch) for branch in branches]
+    """Get all branches, served from the reference data cache."""
+    snapshot = await branch_cache.get()
+    return cached_response(request, snapshot.listing, BRANCH_CACHE_CONTROL)
 
 @router.get("/{branch_id}", response_model=BranchResponse)
-def read_branch(
+async def read_branch(
     branch_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get a specific branch."""
-    branch = db.query(Branch).filter(Branch.id == branch_id).first()
-    if not branch:
+    snapshot = await branch_cache.get()
+    representation = snapshot.by_id.get(branch_id)
+    if representation is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Branch not found"
         )
-    return BranchResponse.model_validate(branch)
+    return cached_response(request, representation, BRANCH_CACHE_CONTROL)
@@ -1,82 +1,262 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
-
-from app.core.database import get_db
-from app.models.user import User
-from app.models.client import Client
-from app.core.security import get_current_user
-from app.services.client_service import ClientService
+from typing import List, Optional, Tuple
+from fastapi import (
+    APIRouter, Depends, File, Header, HTTPException, Query, Request, Response, UploadFile, status
+)
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import RequestSession, request_session, use_replica
+from app.core.security import (
+    get_current_user, get_read_request_db, get_write_request_db, Principal
+)
+from app.core.pagination import (
+    decode_cursor,
+    cursor_value,
+    keyset_page,
+    keyset_meta,
+    offset_meta,
+    TOTAL_EXACT,
+    TOTAL_ESTIMATE
+)
+from app.core.result_cache import list_cache, list_scope
+from app.core.serialization import PageRenderer, json_response, parse_fields
+from app.core.export import (
+    stream_query, encode_rows, export_response, EXPORT_CSV, EXPORT_FORMAT_PATTERN
+)
+from app.core.bulk import BulkReport, import_format, read_chunks, IMPORT_FORMAT_PATTERN
+from app.core.http_cache import etag_matches, not_modified, DETAIL_CACHE_CONTROL
+from app.services.client_service import (
+    ClientService, AsyncClientService, client_detail_etag, CLIENT_LIST_FIELDS
+)
 from app.schemas.client import (
     ClientCreate,
     ClientUpdate,
     ClientResponse,
-    ClientList
+    ClientList,
+    ClientWithPoliciesList
 )
+from app.schemas.bulk import BulkResult
 
 router = APIRouter()
 
+client_page = PageRenderer(ClientList)
+client_with_policies_page = PageRenderer(ClientWithPoliciesList)
+
+# expand= value that embeds each client's policies in the list
+EXPAND_POLICIES = "policies"
+
 @router.get("/", response_model=ClientList)
-def read_clients(
+async def read_clients(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     search: Optional[str] = None,
     branch_id: Optional[int] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = Query(
+        None,
+        description="Opaque keyset cursor from meta.next_cursor; pass an empty value to start"
+    ),
+    include_total: bool = True,
+    total: str = Query(TOTAL_EXACT, regex="^(exact|estimate)$"),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated response fields (sparse fieldset); id is always included"
+    ),
+    expand: Optional[str] = Query(
+        None,
+        regex=f"^{EXPAND_POLICIES}$",
+        description="Embed each client's policies, loaded in one query for the page"
+    ),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get list of clients with pagination and filtering."""
-    client_service = ClientService(db)
-
-    clients = client_service.get_clients(
-        current_user=current_user,
-        skip=skip,
-        limit=limit,
-        search=search,
-        branch_id=branch_id
-    )
+    selected = parse_fields(fields, CLIENT_LIST_FIELDS, CLIENT_LIST_FIELDS)
+
+    # Cached per effective branch, which already accounts for branch_id
+    params = {
+        "skip": skip,
+        "limit": limit,
+        "search": search,
+        "cursor": cursor,
+        "include_total": include_total,
+        "total": total,
+        "fields": selected,
+        "expand": expand
+    }
+
+    async def load() -> bytes:
+        # Concurrent identical requests share this load, so it opens its own session
+        async with request_session(replica=use_replica(current_user.id)) as db:
+            return await _load_clients(
+                AsyncClientService(db),
+                current_user,
+                skip=skip,
+                limit=limit,
+                branch_id=branch_id,
+                search=search,
+                cursor=cursor,
+                include_total=include_total,
+                total=total,
+                fields=selected,
+                expand=expand
+            )
 
-    total_count = client_service.get_client_count(
-        current_user=current_user,
-        search=search,
-        branch_id=branch_id
+    body = await list_cache.get_or_load(
+        "clients", list_scope(current_user, branch_id), params, load, user_id=current_user.id
     )
+    return json_response(body)
 
-    total_pages = (total_count + limit - 1) // limit
+async def _load_clients(
+    client_service: AsyncClientService,
+    current_user: Principal,
+    skip: int,
+    limit: int,
+    branch_id: Optional[int],
+    search: Optional[str],
+    cursor: Optional[str],
+    include_total: bool,
+    total: str,
+    fields: Tuple[str, ...],
+    expand: Optional[str] = None
+) -> bytes:
+    """Build one page of clients, rendered to JSON."""
+    if cursor is not None:
+        # Keyset pagination on the client id
+        after_id = cursor_value(decode_cursor(cursor), "id")
+        rows = await client_service.get_clients_after(
+            current_user=current_user,
+            after_id=after_id,
+            limit=limit,
+            search=search,
+            branch_id=branch_id,
+            fields=fields
+        )
+        clients, next_cursor = keyset_page(rows, limit, lambda c: {"id": c.id})
+        meta = keyset_meta(limit, next_cursor)
+    elif not include_total:
+        # Infinite scroll: no total, just whether another page follows
+        rows = await client_service.get_clients(
+            current_user=current_user,
+            skip=skip,
+            limit=limit + 1,
+            search=search,
+            branch_id=branch_id,
+            fields=fields
+        )
+        clients = rows[:limit]
+        meta = offset_meta(skip, limit, None, has_more=len(rows) > limit)
+    elif total == TOTAL_ESTIMATE:
+        clients = await client_service.get_clients(
+            current_user=current_user,
+            skip=skip,
+            limit=limit,
+            search=search,
+            branch_id=branch_id,
+            fields=fields
+        )
+        total_count = await client_service.get_client_count_estimate(
+            current_user=current_user,
+            search=search,
+            branch_id=branch_id
+        )
+        meta = offset_meta(skip, limit, total_count, estimated=True)
+    else:
+        clients, total_count = await client_service.get_clients_with_total(
+            current_user=current_user,
+            skip=skip,
+            limit=limit,
+            search=search,
+            branch_id=branch_id,
+            fields=fields
+        )
+        meta = offset_meta(skip, limit, total_count)
 
-    return ClientList(
-        data=[ClientResponse.model_validate(client) for client in clients],
-        meta={
-            "page": (skip // limit) + 1,
-            "per_page": limit,
-            "total": total_count,
-            "total_pages": total_pages
-        }
+    if expand == EXPAND_POLICIES:
+        clients = await client_service.with_policies(clients)
+        return client_with_policies_page.render(clients, meta, fields + ("policies",))
+    return client_page.render(clients, meta, fields)
+
+@router.get("/export")
+async def export_clients(
+    export_format: str = Query(EXPORT_CSV, alias="format", regex=EXPORT_FORMAT_PATTERN),
+    gzip: bool = False,
+    search: Optional[str] = None,
+    branch_id: Optional[int] = None,
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated columns to export; id is always included"
+    ),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Stream every client matching the list filters as CSV or NDJSON."""
+    selected = parse_fields(fields, CLIENT_LIST_FIELDS, CLIENT_LIST_FIELDS)
+    rows = stream_query(
+        lambda db: ClientService(db).export_query(
+            current_user, search=search, branch_id=branch_id, fields=selected
+        ),
+        replica=use_replica(current_user.id)
+    )
+    return export_response(
+        encode_rows(rows, ClientResponse, selected, export_format),
+        export_format,
+        "clients",
+        compress=gzip
     )
 
 @router.post("/", response_model=ClientResponse, status_code=status.HTTP_201_CREATED)
-def create_client(
+async def create_client(
     client: ClientCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: RequestSession = Depends(get_write_request_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Create a new client."""
-    client_service = ClientService(db)
-    created_client = client_service.create_client(client, current_user)
+    client_service = AsyncClientService(db)
+    created_client = await client_service.create_client(client, current_user)
     return ClientResponse.model_validate(created_client)
 
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_clients(
+    file: UploadFile = File(..., description="CSV with a header row, or NDJSON"),
+    upload_format: Optional[str] = Query(None, alias="format", regex=IMPORT_FORMAT_PATTERN),
+    db: RequestSession = Depends(get_write_request_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Create clients from a CSV or NDJSON upload.
+
+    Rows are validated, checked and inserted chunk by chunk, each chunk in
+    its own transaction. Invalid rows are skipped and reported by row number;
+    a failure part-way is reported with the rows already imported.
+    """
+    chunks = read_chunks(file.file, import_format(file.filename, upload_format), ClientCreate, "email")
+    client_service = AsyncClientService(db)
+    report = BulkReport()
+    # Parsing and validation are CPU-bound; keep them off the event loop
+    while (chunk := await run_in_threadpool(next, chunks, None)) is not None:
+        valid, errors = chunk
+        created, rejected = await client_service.import_clients(valid, current_user) if valid else (0, [])
+        report.add(len(valid) + len(errors), created, errors + rejected)
+    return report.result()
+
 @router.get("/{client_id}", response_model=dict)
-def read_client(
+async def read_client(
     client_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    db: RequestSession = Depends(get_read_request_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Get a specific client with their policies."""
-    client_service = ClientService(db)
-    client = client_service.get_client_by_id(client_id, current_user)
+    """Get a specific client with their policies.
+
+    Answers a matching If-None-Match with 304 after checking row versions only.
+    """
+    client_service = AsyncClientService(db)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        etag = await client_service.get_client_etag(client_id, current_user)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, DETAIL_CACHE_CONTROL)
 
-    # Get associated policies
-    policies = db.query(Client).filter(Client.id == client_id).first().policies
+    client, policies = await client_service.get_client_with_policies(client_id, current_user)
+    response.headers["ETag"] = client_detail_etag(client, policies)
+    response.headers["Cache-Control"] = DETAIL_CACHE_CONTROL
 
     return {
         "client": ClientResponse.model_validate(client),
@@ -95,24 +275,32 @@ def read_client(
     }
 
 @router.put("/{client_id}", response_model=ClientResponse)
-def update_client(
+async def update_client(
     client_id: int,
     client_update: ClientUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: RequestSession = Depends(get_write_request_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Update an existing client."""
-    client_service = ClientService(db)
-    updated_client = client_service.update_client(client_id, client_update, current_user)
+    """Update an existing client.
+
+    With If-Match, the update fails with 412 if the client changed since it was fetched.
+    """
+    client_service = AsyncClientService(db)
+    updated_client = await client_service.update_client(
+        client_id, client_update, current_user, if_match=if_match
+    )
+    response.headers["ETag"] = await client_service.get_client_etag(client_id, current_user)
     return ClientResponse.model_validate(updated_client)
 
 @router.delete("/{client_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_client(
+async def delete_client(
     client_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: RequestSession = Depends(get_write_request_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Delete a client."""
-    client_service = ClientService(db)
-    client_service.delete_client(client_id, current_user)
+    client_service = AsyncClientService(db)
+    await client_service.delete_client(client_id, current_user)
     return {"message": "Client deleted successfully"}
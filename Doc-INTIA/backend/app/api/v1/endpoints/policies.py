@@ -1,105 +1,324 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
-
-from app.core.database import get_db
-from app.models.user import User
-from app.core.security import get_current_user
-from app.services.policy_service import PolicyService
+from typing import List, Optional, Tuple
+from fastapi import (
+    APIRouter, Depends, File, Header, HTTPException, Query, Request, Response, UploadFile, status
+)
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import RequestSession, request_session, use_replica
+from app.core.security import (
+    get_current_user, get_read_request_db, get_write_request_db, Principal
+)
+from app.core.pagination import (
+    decode_cursor,
+    cursor_value,
+    keyset_page,
+    keyset_meta,
+    offset_meta,
+    TOTAL_EXACT,
+    TOTAL_ESTIMATE
+)
+from app.core.result_cache import list_cache, list_scope
+from app.core.serialization import PageRenderer, json_response, parse_fields
+from app.core.export import (
+    stream_query, encode_rows, export_response, EXPORT_CSV, EXPORT_FORMAT_PATTERN
+)
+from app.core.bulk import BulkReport, import_format, read_chunks, IMPORT_FORMAT_PATTERN
+from app.core.http_cache import etag_matches, not_modified, DETAIL_CACHE_CONTROL
+from app.services.policy_service import (
+    PolicyService, AsyncPolicyService, policy_etag, POLICY_LIST_FIELDS, POLICY_DEFAULT_FIELDS
+)
 from app.schemas.policy import (
     PolicyCreate,
     PolicyUpdate,
     PolicyResponse,
-    PolicyList
+    PolicyList,
+    PolicyBulkStatusUpdate
 )
+from app.schemas.bulk import BulkResult
 
 router = APIRouter()
 
+policy_page = PageRenderer(PolicyList)
+
 @router.get("/", response_model=PolicyList)
-def read_policies(
+async def read_policies(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     client_id: Optional[int] = None,
     status: Optional[str] = Query(None, regex="^(active|pending|cancelled|expired)$"),
     branch_id: Optional[int] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = Query(
+        None,
+        description="Opaque keyset cursor from meta.next_cursor; pass an empty value to start"
+    ),
+    include_total: bool = True,
+    total: str = Query(TOTAL_EXACT, regex="^(exact|estimate)$"),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated response fields (sparse fieldset); id is always included"
+    ),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get list of policies with pagination and filtering."""
-    policy_service = PolicyService(db)
-
-    policies = policy_service.get_policies(
-        current_user=current_user,
-        skip=skip,
-        limit=limit,
-        client_id=client_id,
-        status=status,
-        branch_id=branch_id,
-        search=search
-    )
+    selected = parse_fields(fields, POLICY_LIST_FIELDS, POLICY_DEFAULT_FIELDS)
 
-    total_count = policy_service.get_policy_count(
-        current_user=current_user,
-        client_id=client_id,
-        status=status,
-        branch_id=branch_id,
-        search=search
+    # Cached per effective branch, which already accounts for branch_id
+    params = {
+        "skip": skip,
+        "limit": limit,
+        "client_id": client_id,
+        "status": status,
+        "search": search,
+        "cursor": cursor,
+        "include_total": include_total,
+        "total": total,
+        "fields": selected
+    }
+
+    async def load() -> bytes:
+        # Concurrent identical requests share this load, so it opens its own session
+        async with request_session(replica=use_replica(current_user.id)) as db:
+            return await _load_policies(
+                AsyncPolicyService(db),
+                current_user,
+                skip=skip,
+                limit=limit,
+                client_id=client_id,
+                status=status,
+                branch_id=branch_id,
+                search=search,
+                cursor=cursor,
+                include_total=include_total,
+                total=total,
+                fields=selected
+            )
+
+    body = await list_cache.get_or_load(
+        "policies", list_scope(current_user, branch_id), params, load, user_id=current_user.id
     )
+    return json_response(body)
+
+async def _load_policies(
+    policy_service: AsyncPolicyService,
+    current_user: Principal,
+    skip: int,
+    limit: int,
+    client_id: Optional[int],
+    status: Optional[str],
+    branch_id: Optional[int],
+    search: Optional[str],
+    cursor: Optional[str],
+    include_total: bool,
+    total: str,
+    fields: Tuple[str, ...]
+) -> bytes:
+    """Build one page of policies, rendered to JSON."""
+    if cursor is not None:
+        # Keyset pagination on the policy id
+        after_id = cursor_value(decode_cursor(cursor), "id")
+        rows = await policy_service.get_policies_after(
+            current_user=current_user,
+            after_id=after_id,
+            limit=limit,
+            client_id=client_id,
+            status=status,
+            branch_id=branch_id,
+            search=search,
+            fields=fields
+        )
+        policies, next_cursor = keyset_page(rows, limit, lambda p: {"id": p.id})
+        return policy_page.render(policies, keyset_meta(limit, next_cursor), fields)
+
+    if not include_total:
+        # Infinite scroll: no total, just whether another page follows
+        rows = await policy_service.get_policies(
+            current_user=current_user,
+            skip=skip,
+            limit=limit + 1,
+            client_id=client_id,
+            status=status,
+            branch_id=branch_id,
+            search=search,
+            fields=fields
+        )
+        policies = rows[:limit]
+        meta = offset_meta(skip, limit, None, has_more=len(rows) > limit)
+    elif total == TOTAL_ESTIMATE:
+        policies = await policy_service.get_policies(
+            current_user=current_user,
+            skip=skip,
+            limit=limit,
+            client_id=client_id,
+            status=status,
+            branch_id=branch_id,
+            search=search,
+            fields=fields
+        )
+        total_count = await policy_service.get_policy_count_estimate(
+            current_user=current_user,
+            client_id=client_id,
+            status=status,
+            branch_id=branch_id,
+            search=search
+        )
+        meta = offset_meta(skip, limit, total_count, estimated=True)
+    else:
+        policies, total_count = await policy_service.get_policies_with_total(
+            current_user=current_user,
+            skip=skip,
+            limit=limit,
+            client_id=client_id,
+            status=status,
+            branch_id=branch_id,
+            search=search,
+            fields=fields
+        )
+        meta = offset_meta(skip, limit, total_count)
 
-    total_pages = (total_count + limit - 1) // limit
+    return policy_page.render(policies, meta, fields)
+
+@router.get("/export")
+async def export_policies(
+    export_format: str = Query(EXPORT_CSV, alias="format", regex=EXPORT_FORMAT_PATTERN),
+    gzip: bool = False,
+    client_id: Optional[int] = None,
+    status: Optional[str] = Query(None, regex="^(active|pending|cancelled|expired)$"),
+    branch_id: Optional[int] = None,
+    search: Optional[str] = None,
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated columns to export; id is always included"
+    ),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Stream every policy matching the list filters as CSV or NDJSON.
 
-    return PolicyList(
-        data=[PolicyResponse.model_validate(policy) for policy in policies],
-        meta={
-            "page": (skip // limit) + 1,
-            "per_page": limit,
-            "total": total_count,
-            "total_pages": total_pages
-        }
+    Unlike the list, exports include coverage unless `fields` says otherwise.
+    """
+    selected = parse_fields(fields, POLICY_LIST_FIELDS, POLICY_LIST_FIELDS)
+    rows = stream_query(
+        lambda db: PolicyService(db).export_query(
+            current_user,
+            client_id=client_id,
+            status=status,
+            branch_id=branch_id,
+            search=search,
+            fields=selected
+        ),
+        replica=use_replica(current_user.id)
+    )
+    return export_response(
+        encode_rows(rows, PolicyResponse, selected, export_format),
+        export_format,
+        "policies",
+        compress=gzip
     )
 
 @router.post("/", response_model=PolicyResponse, status_code=status.HTTP_201_CREATED)
-def create_policy(
+async def create_policy(
     policy: PolicyCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: RequestSession = Depends(get_write_request_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Create a new insurance policy."""
-    policy_service = PolicyService(db)
-    created_policy = policy_service.create_policy(policy, current_user)
+    policy_service = AsyncPolicyService(db)
+    created_policy = await policy_service.create_policy(policy, current_user)
     return PolicyResponse.model_validate(created_policy)
 
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_policies(
+    file: UploadFile = File(..., description="CSV with a header row, or NDJSON"),
+    upload_format: Optional[str] = Query(None, alias="format", regex=IMPORT_FORMAT_PATTERN),
+    db: RequestSession = Depends(get_write_request_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Create policies from a CSV or NDJSON upload.
+
+    Rows are validated, checked and inserted chunk by chunk, each chunk in
+    its own transaction. Invalid rows are skipped and reported by row number;
+    a failure part-way is reported with the rows already imported.
+    """
+    chunks = read_chunks(
+        file.file, import_format(file.filename, upload_format), PolicyCreate, "policy_number"
+    )
+    policy_service = AsyncPolicyService(db)
+    report = BulkReport()
+    # Parsing and validation are CPU-bound; keep them off the event loop
+    while (chunk := await run_in_threadpool(next, chunks, None)) is not None:
+        valid, errors = chunk
+        created, rejected = await policy_service.import_policies(valid, current_user) if valid else (0, [])
+        report.add(len(valid) + len(errors), created, errors + rejected)
+    return report.result()
+
+@router.patch("/bulk-status", response_model=BulkResult)
+async def bulk_update_policy_status(
+    update: PolicyBulkStatusUpdate,
+    db: RequestSession = Depends(get_write_request_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Move many policies to one status in a single transaction.
+
+    Unknown or inaccessible policies are reported (row = position in
+    policy_ids) and the others are updated.
+    """
+    policy_service = AsyncPolicyService(db)
+    updated, errors = await policy_service.update_policy_statuses(update, current_user)
+    report = BulkReport()
+    report.add(updated + len(errors), updated, errors)
+    return report.result()
+
 @router.get("/{policy_id}", response_model=PolicyResponse)
-def read_policy(
+async def read_policy(
     policy_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    db: RequestSession = Depends(get_read_request_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Get a specific policy."""
-    policy_service = PolicyService(db)
-    policy = policy_service.get_policy_by_id(policy_id, current_user)
+    """Get a specific policy.
+
+    Answers a matching If-None-Match with 304 after checking the row version only.
+    """
+    policy_service = AsyncPolicyService(db)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        etag = await policy_service.get_policy_etag(policy_id, current_user)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, DETAIL_CACHE_CONTROL)
+
+    policy = await policy_service.get_policy_by_id(policy_id, current_user)
+    response.headers["ETag"] = policy_etag(policy)
+    response.headers["Cache-Control"] = DETAIL_CACHE_CONTROL
     return PolicyResponse.model_validate(policy)
 
 @router.put("/{policy_id}", response_model=PolicyResponse)
-def update_policy(
+async def update_policy(
     policy_id: int,
     policy_update: PolicyUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: RequestSession = Depends(get_write_request_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Update an existing policy."""
-    policy_service = PolicyService(db)
-    updated_policy = policy_service.update_policy(policy_id, policy_update, current_user)
+    """Update an existing policy.
+
+    With If-Match, the update fails with 412 if the policy changed since it was fetched.
+    """
+    policy_service = AsyncPolicyService(db)
+    updated_policy = await policy_service.update_policy(
+        policy_id, policy_update, current_user, if_match=if_match
+    )
+    response.headers["ETag"] = policy_etag(updated_policy)
     return PolicyResponse.model_validate(updated_policy)
 
 @router.delete("/{policy_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_policy(
+async def delete_policy(
     policy_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: RequestSession = Depends(get_write_request_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Delete a policy."""
-    policy_service = PolicyService(db)
-    policy_service.delete_policy(policy_id, current_user)
+    policy_service = AsyncPolicyService(db)
+    await policy_service.delete_policy(policy_id, current_user)
     return {"message": "Policy deleted successfully"}
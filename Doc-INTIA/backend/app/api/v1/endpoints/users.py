@@ -2,17 +2,16 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
 from app.models.user import User
-from app.core.security import get_current_user, ROLE_ADMIN
+from app.core.security import get_current_user, get_read_db, Principal, ROLE_ADMIN
 from app.schemas.user import UserResponse
 
 router = APIRouter()
 
 @router.get("/", response_model=List[UserResponse])
 def read_users(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get all users (ADMIN only)."""
     # Only ADMIN users can access user list
@@ -28,8 +27,8 @@ def read_users(
 @router.get("/{user_id}", response_model=UserResponse)
 def read_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get a specific user (ADMIN only)."""
     # Only ADMIN users can access user details
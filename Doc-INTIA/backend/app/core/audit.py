@@ -1,12 +1,20 @@
 from sqlalchemy import (
-    Column, Integer, String, DateTime, Text, ForeignKey, JSON
+    Column, Integer, String, DateTime, Text, ForeignKey, JSON, Index, insert
 )
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import relationship, Session
 from datetime import datetime, date
 from decimal import Decimal
-from typing import Optional, Any
+from typing import Optional, Any, Iterable, List, Tuple
+import json
+import logging
+import os
+import queue
+import threading
+import time
 
-from app.core.database import Base
+from app.core.database import Base, SessionLocal
+from app.core.writer import write_queue
 
 # Action constants
 ACTION_CREATE = "CREATE"
@@ -22,17 +30,33 @@ RESOURCE_POLICY = "policy"
 RESOURCE_USER = "user"
 RESOURCE_BRANCH = "branch"
 
+# Audit writer modes: "async" batches rows on a background thread,
+# "sync" writes each row in the caller's session (used by tests and scripts)
+AUDIT_MODE_ASYNC = "async"
+AUDIT_MODE_SYNC = "sync"
+
+AUDIT_WRITER_MODE = os.getenv("AUDIT_WRITER_MODE", AUDIT_MODE_ASYNC)
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "0.5"))
+AUDIT_ENQUEUE_TIMEOUT = float(os.getenv("AUDIT_ENQUEUE_TIMEOUT", "5"))
+# Attempts at writing a batch that fails with a transient (operational)
+# error, and the backoff between them, doubling up to the max
+AUDIT_WRITE_ATTEMPTS = max(1, int(os.getenv("AUDIT_WRITE_ATTEMPTS", "5")))
+AUDIT_RETRY_DELAY = float(os.getenv("AUDIT_RETRY_DELAY", "0.5"))
+AUDIT_RETRY_MAX_DELAY = float(os.getenv("AUDIT_RETRY_MAX_DELAY", "30"))
+
+logger = logging.getLogger(__name__)
+
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    user_id = Column(
-        Integer, ForeignKey("users.id"), nullable=False, index=True
-    )
-    action = Column(String(20), nullable=False, index=True)
-    resource_type = Column(String(50), nullable=False, index=True)
-    resource_id = Column(Integer, nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    action = Column(String(20), nullable=False)
+    resource_type = Column(String(50), nullable=False)
+    resource_id = Column(Integer, nullable=False)
     old_values = Column(JSON, nullable=True)
     new_values = Column(JSON, nullable=True)
     timestamp = Column(
@@ -44,6 +68,15 @@ class AuditLog(Base):
     ip_address = Column(String(45), nullable=True)
     user_agent = Column(Text, nullable=True)
 
+    # Each list filter leads an index that ends with the timestamp, so
+    # filtered lists are read in (timestamp, id) order without a sort.
+    # Every index is paid for on each audit insert; keep the set small.
+    __table_args__ = (
+        Index("ix_audit_logs_user_id_timestamp", "user_id", "timestamp"),
+        Index("ix_audit_logs_action_timestamp", "action", "timestamp"),
+        Index("ix_audit_logs_resource_timestamp", "resource_type", "resource_id", "timestamp"),
+    )
+
     # Relationships
     user = relationship("User", back_populates="audit_logs")
 
@@ -72,6 +105,184 @@ def serialize_for_json(obj: Any) -> Any:
         return obj
 
 
+class AuditWriter:
+    """Background writer that batches audit rows into multi-row inserts.
+
+    Standalone events (see log_action with `commit=True`) go into a bounded
+    queue. A single thread flushes them when a batch fills up or the flush
+    interval elapses. When the queue is full, callers block for up to
+    `enqueue_timeout` seconds (backpressure) and then write the row
+    themselves. A batch that fails with an operational error is retried a
+    bounded number of times; a batch that cannot be written is logged in
+    full as a dead letter, so its rows can be replayed.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        maxsize: int = AUDIT_QUEUE_SIZE,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL,
+        enqueue_timeout: float = AUDIT_ENQUEUE_TIMEOUT
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the writer thread."""
+        if self.running:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="audit-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Flush every queued row and stop the writer thread."""
+        if not self.running:
+            return
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, row: dict) -> bool:
+        """Queue a row; returns False if the queue stayed full or the writer is down."""
+        if not self.running:
+            return False
+        try:
+            self._queue.put(row, timeout=self.enqueue_timeout)
+        except queue.Full:
+            return False
+        return True
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+
+        # Drain anything enqueued after the stop marker
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not self._STOP:
+                batch.append(item)
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, rows: List[dict]) -> None:
+        write_audit_rows_retrying(rows)
+
+
+def _insert_audit_rows(db: Session, rows: List[dict]) -> None:
+    db.execute(insert(AuditLog), rows)
+    db.commit()
+
+
+def write_audit_rows(rows: List[dict]) -> None:
+    """Insert audit rows in one multi-row statement on a dedicated session.
+
+    Goes through the SQLite write queue when it is running. Raises if the
+    insert fails.
+    """
+    if write_queue.running:
+        write_queue.execute(_insert_audit_rows, rows)
+        return
+
+    db = SessionLocal()
+    try:
+        _insert_audit_rows(db, rows)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def write_audit_rows_retrying(rows: List[dict], attempts: int = AUDIT_WRITE_ATTEMPTS) -> bool:
+    """Write audit rows, retrying operational errors with backoff.
+
+    Other errors (constraint violations) are not retried. Returns whether
+    the rows were written; rows that were not are logged as a dead letter.
+    """
+    delay = AUDIT_RETRY_DELAY
+    for attempt in range(1, attempts + 1):
+        try:
+            write_audit_rows(rows)
+            return True
+        except OperationalError as e:
+            if attempt == attempts:
+                error = e
+                break
+            logger.warning(
+                "Failed to write %d audit log(s), retrying in %gs: %s", len(rows), delay, e
+            )
+            time.sleep(delay)
+            delay = min(delay * 2, AUDIT_RETRY_MAX_DELAY)
+        except Exception as e:
+            error = e
+            break
+    logger.error(
+        "Dropping %d audit log(s) that could not be written (%s): %s",
+        len(rows), error, json.dumps(rows, default=str)
+    )
+    return False
+
+
+audit_writer = AuditWriter()
+
+
+def _audit_row(
+    user_id: int,
+    action: str,
+    resource_type: str,
+    resource_id: int,
+    old_values: Optional[dict],
+    new_values: Optional[dict],
+    ip_address: Optional[str],
+    user_agent: Optional[str]
+) -> dict:
+    # Serialize date/datetime objects to strings for JSON storage
+    return {
+        "user_id": user_id,
+        "action": action,
+        "resource_type": resource_type,
+        "resource_id": resource_id,
+        "old_values": serialize_for_json(old_values) if old_values else None,
+        "new_values": serialize_for_json(new_values) if new_values else None,
+        "timestamp": datetime.utcnow(),
+        "ip_address": ip_address,
+        "user_agent": user_agent
+    }
+
+
 def log_action(
     db_session: Session,
     user_id: int,
@@ -81,28 +292,52 @@ def log_action(
     old_values: Optional[dict] = None,
     new_values: Optional[dict] = None,
     ip_address: Optional[str] = None,
-    user_agent: Optional[str] = None
-) -> AuditLog:
-    """Log an action to the audit log."""
-    # Serialize date/datetime objects to strings for JSON storage
-    serialized_old_values = (
-        serialize_for_json(old_values) if old_values else None
-    )
-    serialized_new_values = (
-        serialize_for_json(new_values) if new_values else None
-    )
+    user_agent: Optional[str] = None,
+    commit: bool = True
+) -> Optional[AuditLog]:
+    """Log an action to the audit log.
 
-    audit_log = AuditLog(
-        user_id=user_id,
-        action=action,
-        resource_type=resource_type,
-        resource_id=resource_id,
-        old_values=serialized_old_values,
-        new_values=serialized_new_values,
-        ip_address=ip_address,
-        user_agent=user_agent
+    With `commit=False` the row is added to `db_session`, so the caller
+    commits the change and its audit row in one transaction.
+    With `commit=True` (a standalone event) the row is queued to the
+    background writer, or committed in `db_session` when the writer is not
+    running. Returns the AuditLog only when it was added to `db_session`.
+    """
+    row = _audit_row(
+        user_id, action, resource_type, resource_id,
+        old_values, new_values, ip_address, user_agent
     )
+
+    if commit and audit_writer.submit(row):
+        return None
+
+    audit_log = AuditLog(**row)
     db_session.add(audit_log)
-    db_session.commit()
-    db_session.refresh(audit_log)
+    if commit:
+        db_session.commit()
     return audit_log
+
+
+def log_actions(
+    db_session: Session,
+    user_id: int,
+    action: str,
+    resource_type: str,
+    changes: Iterable[Tuple[int, Optional[dict], Optional[dict]]],
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None
+) -> None:
+    """Log one action on many resources as part of the caller's unit of work.
+
+    `changes` holds (resource_id, old_values, new_values) tuples. Like
+    log_action with `commit=False`, the rows are inserted into `db_session`
+    with a single multi-row statement and commit with the caller's change.
+    """
+    rows = [
+        _audit_row(user_id, action, resource_type, resource_id, old_values, new_values,
+                   ip_address, user_agent)
+        for resource_id, old_values, new_values in changes
+    ]
+    if not rows:
+        return
+    db_session.execute(insert(AuditLog), rows)
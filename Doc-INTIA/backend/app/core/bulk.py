@@ -0,0 +1,139 @@
+"""Bulk imports from CSV / NDJSON uploads.
+
+Uploads are spooled to disk by the multipart parser and read back one
+chunk of BULK_CHUNK_SIZE records at a time, so files of any size are
+processed in constant memory. Each chunk is validated against the create
+schema before it reaches the database; the services then check and insert
+the valid rows of a chunk with set-based statements in one unit of work.
+Rows that fail are skipped and reported with their row number. Chunks
+commit one by one, so a failure part-way (an unreadable upload, a chunk
+rolled back by a constraint) is reported alongside the rows already
+imported rather than failing the request.
+"""
+import csv
+import io
+import json
+import os
+from typing import Any, BinaryIO, Iterator, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError
+
+from app.core.export import EXPORT_CSV, EXPORT_NDJSON, EXPORT_FORMAT_PATTERN, batched
+from app.schemas.bulk import BulkResult, BulkRowError
+
+# Records validated, checked and inserted together
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+
+IMPORT_FORMAT_PATTERN = EXPORT_FORMAT_PATTERN
+IMPORT_EXTENSIONS = {".csv": EXPORT_CSV, ".ndjson": EXPORT_NDJSON, ".jsonl": EXPORT_NDJSON}
+
+# A validated record: its 1-based row number in the upload and the parsed model
+ValidRow = Tuple[int, BaseModel]
+
+
+def import_format(filename: Optional[str], requested: Optional[str] = None) -> str:
+    """The upload format: as requested, else from the file extension."""
+    if requested:
+        return requested
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension not in IMPORT_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot tell the upload format; pass format=csv or format=ndjson"
+        )
+    return IMPORT_EXTENSIONS[extension]
+
+
+def read_records(file: BinaryIO, import_format: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (row number, record) pairs from an upload.
+
+    CSV rows become dicts keyed by the header, with empty cells left out so
+    optional fields take their defaults. A record that cannot be parsed is
+    yielded as an error message instead of a dict.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if import_format == EXPORT_CSV:
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            yield row_number, {
+                key: value for key, value in row.items() if key and value not in ("", None)
+            }
+        return
+    row_number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, f"Invalid JSON: {e.msg}"
+            continue
+        yield row_number, record if isinstance(record, dict) else "Expected a JSON object"
+
+
+def _error_messages(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(map(str, detail['loc']))}: {detail['msg']}" if detail["loc"] else detail["msg"]
+        for detail in error.errors(include_url=False)
+    ]
+
+
+def read_chunks(
+    file: BinaryIO,
+    import_format: str,
+    schema: Type[BaseModel],
+    key: str,
+    size: int = BULK_CHUNK_SIZE
+) -> Iterator[Tuple[List[ValidRow], List[BulkRowError]]]:
+    """Yield each chunk of an upload as (valid rows, validation errors).
+
+    `key` names the field that identifies a record in the error report.
+    If the upload turns out to be unreadable, the last chunk holds a single
+    error for the first row not processed, and reading stops there.
+    """
+    row_number = 0
+    try:
+        for chunk in batched(read_records(file, import_format), size):
+            valid, errors = [], []
+            for row_number, record in chunk:
+                if isinstance(record, str):
+                    errors.append(BulkRowError(row=row_number, errors=[record]))
+                    continue
+                try:
+                    valid.append((row_number, schema.model_validate(record)))
+                except ValidationError as e:
+                    label = record.get(key)
+                    errors.append(BulkRowError(
+                        row=row_number,
+                        key=str(label) if label is not None else None,
+                        errors=_error_messages(e)
+                    ))
+            yield valid, errors
+    except (UnicodeDecodeError, csv.Error) as e:
+        yield [], [BulkRowError(
+            row=row_number + 1,
+            errors=[f"Unreadable upload from this row on: {e}"]
+        )]
+
+
+class BulkReport:
+    """Accumulates per-chunk outcomes into the response of a bulk endpoint."""
+
+    def __init__(self):
+        self.total = 0
+        self.succeeded = 0
+        self.errors: List[BulkRowError] = []
+
+    def add(self, processed: int, succeeded: int, errors: List[BulkRowError]) -> None:
+        self.total += processed
+        self.succeeded += succeeded
+        self.errors.extend(errors)
+
+    def result(self) -> BulkResult:
+        return BulkResult(
+            total=self.total,
+            succeeded=self.succeeded,
+            failed=len(self.errors),
+            errors=sorted(self.errors, key=lambda error: error.row)
+        )
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """Thread-safe in-memory LRU cache whose entries expire after a TTL."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live entry, or default if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the cached value, computing and storing it on a miss."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> None:
+        """Drop every entry, or only those whose key matches the predicate."""
+        with self._lock:
+            if predicate is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SingleFlight:
+    """Coalesces concurrent async calls with the same key into one execution.
+
+    The first caller starts `fn` as a task; callers arriving while it runs
+    await the same task and get the same result (or exception). The task is
+    shielded, so a caller that disconnects does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._land(key, done))
+        return await asyncio.shield(task)
+
+    def _land(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller went away
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._flights)
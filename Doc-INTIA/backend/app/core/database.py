@@ -1,23 +1,178 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Optional, Union
 import os
 
+from app.core.cache import TTLCache
+from app.core.metrics import InstrumentedQueuePool, InstrumentedAsyncAdaptedQueuePool
+
 # Database URL - defaults to SQLite for development
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./intia_assurance.db")
 
+# Serve async endpoints from an AsyncSession (true) or from a sync Session
+# on the threadpool (false)
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "true").lower() in ("1", "true", "yes")
+
+# Optional read replica. GET handlers read from it unless the user wrote
+# within the last READ_YOUR_WRITES_SECONDS, in which case they stay on the
+# primary and see their own changes.
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL") or None
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+# Async drivers for the sync URLs we support
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+# Connection pool profile
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# SQLite profile, applied to every new connection. WAL lets readers run
+# alongside a writer; synchronous=NORMAL is durable in WAL mode except on
+# power loss.
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # Negative: KiB (64 MiB)
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))  # Milliseconds
+
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def is_memory_sqlite(url: str) -> bool:
+    return is_sqlite(url) and (":memory:" in url or url.rstrip("/").endswith("sqlite:"))
+
+
+def engine_options(url: str, use_async: bool = False) -> dict:
+    """create_engine keyword arguments for the configured pool profile."""
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False}
+        if is_memory_sqlite(url):
+            # In-memory databases live in a single connection; keep SQLAlchemy's pool
+            return options
+    options.update({
+        "poolclass": InstrumentedAsyncAdaptedQueuePool if use_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    })
+    return options
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Apply the SQLite performance profile to a new connection."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT}")
+    cursor.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size = {SQLITE_CACHE_SIZE}")
+    cursor.close()
+
+
+def apply_read_only(dbapi_connection, connection_record) -> None:
+    """Reject writes on read replica connections."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only = ON")
+    cursor.close()
+
+
+def configure_engine(sync_engine: Engine, url: str, read_only: bool = False) -> None:
+    """Register per-connection setup on an engine."""
+    if is_sqlite(url):
+        event.listen(sync_engine, "connect", apply_sqlite_pragmas)
+        if read_only:
+            event.listen(sync_engine, "connect", apply_read_only)
+
+
 # Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+configure_engine(engine, DATABASE_URL)
+
+# Create SessionLocal class. Objects keep their state after commit: inserts and
+# updates fetch server defaults through RETURNING, so no refresh is needed.
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
+
+
+def to_async_url(url: str) -> str:
+    """Swap the sync driver in a database URL for its async counterpart."""
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+
+# Async engine and sessions, only created when DATABASE_ASYNC is on
+async_engine = (
+    create_async_engine(to_async_url(DATABASE_URL), **engine_options(DATABASE_URL, use_async=True))
+    if DATABASE_ASYNC else None
+)
+if async_engine is not None:
+    configure_engine(async_engine.sync_engine, DATABASE_URL)
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    if DATABASE_ASYNC else None
 )
 
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Read replica engines and sessions; without a replica they are the primary's
+if DATABASE_READ_URL:
+    read_engine = create_engine(DATABASE_READ_URL, **engine_options(DATABASE_READ_URL))
+    configure_engine(read_engine, DATABASE_READ_URL, read_only=True)
+    ReadSessionLocal = sessionmaker(
+        autocommit=False, autoflush=False, expire_on_commit=False, bind=read_engine
+    )
+    async_read_engine = (
+        create_async_engine(
+            to_async_url(DATABASE_READ_URL), **engine_options(DATABASE_READ_URL, use_async=True)
+        )
+        if DATABASE_ASYNC else None
+    )
+    if async_read_engine is not None:
+        configure_engine(async_read_engine.sync_engine, DATABASE_READ_URL, read_only=True)
+    AsyncReadSessionLocal = (
+        async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+        if DATABASE_ASYNC else None
+    )
+else:
+    read_engine, ReadSessionLocal = engine, SessionLocal
+    async_read_engine, AsyncReadSessionLocal = async_engine, AsyncSessionLocal
+
+# Users who wrote recently, keyed by user id; they read from the primary
+recent_writers = TTLCache(maxsize=10000, ttl=READ_YOUR_WRITES_SECONDS)
+
+
+def mark_write(key: Any) -> None:
+    """Pin a user's reads to the primary for READ_YOUR_WRITES_SECONDS."""
+    if DATABASE_READ_URL:
+        recent_writers.set(key, True)
+
+
+def use_replica(key: Optional[Any] = None) -> bool:
+    """Whether reads for this user can be served by the replica."""
+    return DATABASE_READ_URL is not None and (key is None or recent_writers.get(key) is None)
+
 
 # Create Base class for models
 Base = declarative_base()
 
+# Either kind of session an async endpoint may be handed
+RequestSession = Union[AsyncSession, Session]
+
 # Dependency to get database session
 def get_db():
     db = SessionLocal()
@@ -25,3 +180,48 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency to get an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+@asynccontextmanager
+async def request_session(replica: bool = False):
+    """An AsyncSession, or a sync Session when DATABASE_ASYNC is off, on the
+    primary or on the read replica."""
+    if DATABASE_ASYNC:
+        async with (AsyncReadSessionLocal if replica else AsyncSessionLocal)() as db:
+            yield db
+    else:
+        db = (ReadSessionLocal if replica else SessionLocal)()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+
+
+# Dependency for async endpoints: an AsyncSession, or a sync Session when
+# DATABASE_ASYNC is off. Run ORM work on it with run_db().
+async def get_request_db():
+    async with request_session() as db:
+        yield db
+
+
+async def run_db(db: RequestSession, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run sync ORM code `fn(session, *args, **kwargs)` without blocking the event loop.
+
+    An AsyncSession runs it through run_sync on the async driver; a sync
+    Session runs it on the threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+def is_unique_violation(error: IntegrityError, table: str, column: str) -> bool:
+    """Whether an IntegrityError was raised by a unique constraint on table.column."""
+    message = str(error.orig)
+    return f"{table}.{column}" in message or f"({column})" in message
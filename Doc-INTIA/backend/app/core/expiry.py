@@ -0,0 +1,224 @@
+"""Scheduled expiry of policies past their end date.
+
+A background thread started from the app lifespan runs every
+POLICY_EXPIRY_INTERVAL seconds. Each run moves active and pending policies
+whose end_date has passed to 'expired' in chunks of POLICY_EXPIRY_BATCH_SIZE.
+Each chunk is one write unit: it picks due ids through the partial expiry index,
+applies one set-based UPDATE, and inserts the chunk's audit rows together.
+Progress and timings of the current and last runs are reported by
+/metrics/jobs.
+
+Run once by hand with: python -m app.core.expiry run
+"""
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
+
+from app.core.audit import log_actions, ACTION_UPDATE, RESOURCE_POLICY
+from app.core.database import SessionLocal
+from app.core.result_cache import invalidate_on_commit
+from app.core.security import ROLE_ADMIN
+from app.core.writer import write_queue
+from app.models.policy import InsurancePolicy, is_expirable
+from app.models.user import User
+
+# Seconds between runs; 0 disables the scheduler
+POLICY_EXPIRY_INTERVAL = float(os.getenv("POLICY_EXPIRY_INTERVAL", "3600"))
+POLICY_EXPIRY_BATCH_SIZE = int(os.getenv("POLICY_EXPIRY_BATCH_SIZE", "1000"))
+# User the expiry audit rows are attributed to (falls back to the first admin)
+POLICY_EXPIRY_AUDIT_USER = os.getenv("POLICY_EXPIRY_AUDIT_USER", "admin")
+
+EXPIRED = "expired"
+
+
+def audit_user_id(db: Session) -> Optional[int]:
+    """Id of the user expiry audit rows are attributed to."""
+    user_id = db.query(User.id).filter(User.username == POLICY_EXPIRY_AUDIT_USER).scalar()
+    if user_id is None:
+        user_id = db.query(User.id).filter(User.role == ROLE_ADMIN) \
+            .order_by(User.id).limit(1).scalar()
+    return user_id
+
+
+def due_policies(db: Session, today: date, limit: int = POLICY_EXPIRY_BATCH_SIZE) -> Query:
+    """The next `limit` policies due to expire, read from the partial expiry index."""
+    expirable = is_expirable
+    if db.get_bind().dialect.name == "sqlite":
+        # Most policies are active or pending. Saying so keeps SQLite from
+        # seeking the status index and sorting; likely() still matches the
+        # partial index's WHERE term.
+        expirable = func.likely(is_expirable)
+    return db.query(InsurancePolicy.id, InsurancePolicy.branch_id, InsurancePolicy.status) \
+        .filter(InsurancePolicy.end_date < today, expirable) \
+        .order_by(InsurancePolicy.end_date, InsurancePolicy.id) \
+        .limit(limit)
+
+
+def expire_batch(
+    db: Session,
+    today: date,
+    user_id: int,
+    limit: int = POLICY_EXPIRY_BATCH_SIZE
+) -> int:
+    """Expire up to `limit` due policies and audit them; returns how many changed."""
+    due = due_policies(db, today, limit).with_for_update(skip_locked=True).all()
+    if not due:
+        return 0
+
+    db.query(InsurancePolicy) \
+        .filter(
+            InsurancePolicy.id.in_([row.id for row in due]),
+            is_expirable
+        ) \
+        .update(
+            {InsurancePolicy.status: EXPIRED, InsurancePolicy.updated_at: datetime.utcnow()},
+            synchronize_session=False
+        )
+    log_actions(
+        db_session=db,
+        user_id=user_id,
+        action=ACTION_UPDATE,
+        resource_type=RESOURCE_POLICY,
+        changes=[(row.id, {"status": row.status}, {"status": EXPIRED}) for row in due]
+    )
+    # Set-based updates bypass the ORM flush that tracks list cache writes
+    invalidate_on_commit(db, {row.branch_id for row in due})
+    db.commit()
+    return len(due)
+
+
+def _run_unit(fn, *args) -> int:
+    """Run a write unit through the write queue when it is running."""
+    if write_queue.running:
+        return write_queue.execute(fn, *args)
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class PolicyExpiry:
+    """Background thread that expires due policies periodically."""
+
+    def __init__(
+        self,
+        interval: float = POLICY_EXPIRY_INTERVAL,
+        batch_size: int = POLICY_EXPIRY_BATCH_SIZE
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._current: Optional[dict] = None
+        self._last: Optional[dict] = None
+        self._runs = 0
+        self._total_expired = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def start(self) -> None:
+        """Run now, then every `interval` seconds, on a daemon thread."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="policy-expiry", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop after the chunk in progress, if any."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def run_once(self, today: Optional[date] = None) -> dict:
+        """Expire every policy due before `today` (default: today), chunk by chunk."""
+        today = today or date.today()
+        started = time.perf_counter()
+        progress = {
+            "started_at": datetime.utcnow().isoformat(),
+            "cutoff": today.isoformat(),
+            "expired": 0,
+            "batches": 0,
+            "error": None,
+        }
+        with self._lock:
+            self._current = progress
+        try:
+            db = SessionLocal()
+            try:
+                user_id = audit_user_id(db)
+            finally:
+                db.close()
+            if user_id is None:
+                raise RuntimeError("no user to attribute expiry audit rows to")
+            while not self._stop.is_set():
+                expired = _run_unit(expire_batch, today, user_id, self.batch_size)
+                if not expired:
+                    break
+                with self._lock:
+                    progress["expired"] += expired
+                    progress["batches"] += 1
+        except Exception as e:
+            progress["error"] = str(e)
+            print(f"✗ Policy expiry failed: {e}")
+        progress["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        with self._lock:
+            self._current = None
+            self._last = progress
+            self._runs += 1
+            self._total_expired += progress["expired"]
+        if progress["expired"]:
+            print(
+                f"✓ Expired {progress['expired']} policies in {progress['batches']} batches "
+                f"({progress['duration_ms']:.1f} ms)"
+            )
+        return progress
+
+    def snapshot(self) -> dict:
+        """Scheduler settings, the run in progress and the last completed run."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "running": self._thread is not None,
+                "interval_seconds": self.interval,
+                "batch_size": self.batch_size,
+                "runs": self._runs,
+                "total_expired": self._total_expired,
+                "current_run": dict(self._current) if self._current else None,
+                "last_run": dict(self._last) if self._last else None,
+            }
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            if self._stop.wait(self.interval):
+                break
+
+
+policy_expiry = PolicyExpiry()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["run"]:
+        print("Usage: python -m app.core.expiry run")
+        sys.exit(1)
+    result = PolicyExpiry(interval=0).run_once()
+    if result["error"]:
+        sys.exit(1)
+    if not result["expired"]:
+        print("✓ No policies to expire")
@@ -0,0 +1,117 @@
+"""Streaming CSV / NDJSON exports.
+
+Export endpoints stream every row matching a list's filters instead of
+paging through them. Rows come from a server-side cursor (yield_per) in
+batches of EXPORT_BATCH_SIZE and are encoded batch by batch, so memory stays
+flat however large the export is. The response can be gzip-compressed on the
+fly.
+
+The response body is produced after the endpoint returns, so the rows are
+read through a session owned by the stream rather than the request's.
+"""
+import csv
+import io
+import json
+import os
+import zlib
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, Tuple, Type
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.orm import Query, Session
+
+from app.core.database import ReadSessionLocal, SessionLocal
+from app.core.serialization import fieldset_model
+
+# Rows fetched per round trip and encoded per chunk
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+
+EXPORT_CSV = "csv"
+EXPORT_NDJSON = "ndjson"
+EXPORT_FORMAT_PATTERN = f"^({EXPORT_CSV}|{EXPORT_NDJSON})$"
+
+MEDIA_TYPES = {
+    EXPORT_CSV: "text/csv; charset=utf-8",
+    EXPORT_NDJSON: "application/x-ndjson",
+}
+
+
+def stream_query(build_query: Callable[[Session], Query], replica: bool = False) -> Iterator[Any]:
+    """Yield the rows of a query from a session opened for the stream's lifetime."""
+    db = (ReadSessionLocal if replica else SessionLocal)()
+    try:
+        yield from build_query(db).yield_per(EXPORT_BATCH_SIZE)
+    finally:
+        db.close()
+
+
+def batched(rows: Iterable[Any], size: int) -> Iterator[list]:
+    """Split an iterable into lists of at most `size` items."""
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def encode_rows(
+    rows: Iterable[Any],
+    item_model: Type[BaseModel],
+    fields: Tuple[str, ...],
+    export_format: str
+) -> Iterator[bytes]:
+    """Encode rows as CSV (with a header line) or NDJSON, one chunk per batch.
+
+    Values are serialized through the response model, so they match the
+    list endpoints' JSON.
+    """
+    adapter = TypeAdapter(list[fieldset_model(item_model, fields)])
+    if export_format == EXPORT_CSV:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        yield buffer.getvalue().encode("utf-8")
+        for batch in batched(rows, EXPORT_BATCH_SIZE):
+            buffer.seek(0)
+            buffer.truncate()
+            items = adapter.dump_python(
+                adapter.validate_python(batch, from_attributes=True), mode="json"
+            )
+            writer.writerows([_csv_value(item[field]) for field in fields] for item in items)
+            yield buffer.getvalue().encode("utf-8")
+    else:
+        for batch in batched(rows, EXPORT_BATCH_SIZE):
+            items = adapter.validate_python(batch, from_attributes=True)
+            yield b"".join(item.__pydantic_serializer__.to_json(item) + b"\n" for item in items)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = EXPORT_GZIP_LEVEL) -> Iterator[bytes]:
+    """Compress a stream of chunks into a single gzip stream."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_response(
+    chunks: Iterable[bytes],
+    export_format: str,
+    filename: str,
+    compress: bool = False
+) -> StreamingResponse:
+    """Stream encoded chunks as a file download, gzip-encoded on request."""
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'}
+    if compress:
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[export_format], headers=headers)
@@ -0,0 +1,83 @@
+import hashlib
+from typing import Any, NamedTuple, Optional
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse
+
+# Detail views may be stored but must be revalidated (If-None-Match) before reuse
+DETAIL_CACHE_CONTROL = "private, no-cache"
+
+
+class Representation(NamedTuple):
+    """A serialized JSON response body and its entity tag."""
+    body: bytes
+    etag: str
+
+
+def make_etag(body: bytes) -> str:
+    """Strong entity tag for a response body."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def version_etag(*parts: Any) -> str:
+    """Strong entity tag derived from row versions such as (id, updated_at)."""
+    return make_etag("|".join(map(str, parts)).encode("utf-8"))
+
+
+def represent(content: Any) -> Representation:
+    """Serialize JSON-ready content exactly as JSONResponse would and tag it."""
+    body = JSONResponse(content=content).body
+    return Representation(body=body, etag=make_etag(body))
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches an entity tag."""
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    if "*" in candidates:
+        return True
+    # Weak comparison: W/"x" matches "x"
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def etag_matches_strong(header: Optional[str], etag: str) -> bool:
+    """Whether an If-Match header value matches an entity tag.
+
+    Strong comparison (RFC 7232 section 3.1): a weak W/ validator never matches.
+    """
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def cached_response(
+    request: Request,
+    representation: Representation,
+    cache_control: str
+) -> Response:
+    """200 with the cached body, or 304 when the client already holds it."""
+    headers = {"ETag": representation.etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), representation.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(
+        content=representation.body, media_type="application/json", headers=headers
+    )
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """304 response for a representation the client already holds."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control}
+    )
+
+
+def check_if_match(if_match: Optional[str], etag: str, resource: str) -> None:
+    """Reject a write whose If-Match does not match the current entity tag."""
+    if if_match is not None and not etag_matches_strong(if_match, etag):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=f"{resource} has been modified since it was fetched"
+        )
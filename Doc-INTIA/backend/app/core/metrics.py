@@ -0,0 +1,89 @@
+import threading
+import time
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+
+class PoolMetrics:
+    """Connection checkout wait times and timeouts for one pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record(self, wait_seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def snapshot(self, pool) -> dict:
+        """Counters plus the pool's current utilization."""
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            data = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait_seconds / attempts * 1000, 3) if attempts else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            }
+        if isinstance(pool, QueuePool):
+            capacity = pool.size() + max(pool._max_overflow, 0)
+            data.update({
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "utilization": round(pool.checkedout() / capacity, 3) if capacity else None,
+            })
+        return data
+
+
+class _InstrumentedPoolMixin:
+    """Times every connection checkout into the pool's PoolMetrics."""
+
+    metrics: PoolMetrics
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - start)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_metrics(engine) -> dict:
+    """Metrics for an engine's pool, or just its status if it is not instrumented."""
+    pool = engine.pool
+    metrics = getattr(pool, "metrics", None)
+    if metrics is None:
+        return {"status": pool.status()}
+    return metrics.snapshot(pool)
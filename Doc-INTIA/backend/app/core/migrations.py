@@ -0,0 +1,77 @@
+"""Schema migrations with Alembic.
+
+The application upgrades its database to the latest revision at startup
+(and init_db.py does before seeding). Databases created before migrations
+existed, by Base.metadata.create_all, are stamped with the revision their
+tables match first, then upgraded from there.
+
+Run by hand with:
+
+    python -m app.core.migrations upgrade
+    alembic upgrade head      # plain Alembic, for databases already stamped
+"""
+import os
+import sys
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection, Engine
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ALEMBIC_INI = os.path.join(BACKEND_DIR, "alembic.ini")
+
+# Revisions a pre-migration database can be at, newest first: the revision
+# and a table or column that only exists from it on
+LEGACY_REVISIONS = [
+    ("0003", "refresh_tokens", None),
+    ("0002", "users", "token_version"),
+    ("0001", "users", None),
+]
+
+
+def alembic_config(connection: Optional[Connection] = None) -> Config:
+    """Alembic configuration, optionally bound to an open connection."""
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    # Keep the application's logging configuration
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def legacy_revision(connection: Connection) -> Optional[str]:
+    """Revision an unversioned database matches, or None for an empty one."""
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    if "alembic_version" in tables:
+        return None
+    for revision, table, column in LEGACY_REVISIONS:
+        if table not in tables:
+            continue
+        if column is None or column in {c["name"] for c in inspector.get_columns(table)}:
+            return revision
+    return None
+
+
+def upgrade_database(engine: Engine) -> None:
+    """Bring the database schema to the latest revision."""
+    with engine.begin() as connection:
+        config = alembic_config(connection)
+        revision = legacy_revision(connection)
+        if revision is not None:
+            print(f"Database predates migrations; stamping it at revision {revision}")
+            command.stamp(config, revision)
+        command.upgrade(config, "head")
+
+
+if __name__ == "__main__":
+    from app.core.database import engine
+
+    if sys.argv[1:] != ["upgrade"]:
+        print("Usage: python -m app.core.migrations upgrade")
+        sys.exit(1)
+    upgrade_database(engine)
+    print("✓ Database schema is up to date")
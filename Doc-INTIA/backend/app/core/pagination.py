@@ -0,0 +1,132 @@
+import base64
+import json
+import os
+from typing import Any, Callable, Hashable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.engine.result import result_tuple
+
+from app.core.cache import TTLCache
+
+# Total modes accepted by list endpoints
+TOTAL_EXACT = "exact"
+TOTAL_ESTIMATE = "estimate"
+
+# Approximate totals are cached per filter signature for this many seconds
+COUNT_ESTIMATE_TTL = float(os.getenv("COUNT_ESTIMATE_TTL", "60"))
+
+count_estimates = TTLCache(maxsize=2048, ttl=COUNT_ESTIMATE_TTL)
+
+
+def encode_cursor(values: dict) -> str:
+    """Encode keyset values into an opaque, URL-safe cursor token."""
+    raw = json.dumps(values, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: Optional[str]) -> Optional[dict]:
+    """Decode a cursor token. An empty token starts from the first page."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    if not isinstance(values, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return values
+
+
+def cursor_value(values: Optional[dict], key: str, parse: Callable[[Any], Any] = int) -> Any:
+    """Read and parse a single key from a decoded cursor."""
+    if values is None:
+        return None
+    try:
+        return parse(values[key])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def keyset_page(
+    rows: Sequence[Any],
+    limit: int,
+    key: Callable[[Any], dict]
+) -> Tuple[List[Any], Optional[str]]:
+    """Trim a limit + 1 fetch to one page and build the next cursor."""
+    page = list(rows[:limit])
+    if len(rows) > limit and page:
+        return page, encode_cursor(key(page[-1]))
+    return page, None
+
+
+def keyset_meta(limit: int, next_cursor: Optional[str]) -> dict:
+    """Build the response meta for keyset (cursor) pagination."""
+    return {
+        "per_page": limit,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None
+    }
+
+
+def fetch_with_total(query, skip: int, limit: int) -> Tuple[List[Any], int]:
+    """Fetch one offset page and the filtered total in a single statement.
+
+    The total rides along as a window count on every row. Only a page past
+    the end (no rows, skip > 0) needs a separate COUNT. Entity queries return
+    the entities; column-projected queries return their rows, without the
+    extra total_count column.
+    """
+    descriptions = query.column_descriptions
+    single_entity = len(descriptions) == 1 and descriptions[0]["expr"] is descriptions[0]["entity"]
+    rows = query.add_columns(func.count().over().label("total_count")) \
+        .offset(skip).limit(limit).all()
+    if not rows:
+        return [], query.order_by(None).count() if skip else 0
+    total = rows[0][-1]
+    if single_entity:
+        return [row[0] for row in rows], total
+    make_row = result_tuple(rows[0]._fields[:-1])
+    return [make_row(row[:-1]) for row in rows], total
+
+
+def fetch_without_total(query, skip: int, limit: int) -> Tuple[List[Any], bool]:
+    """Fetch one offset page plus one row to know whether more rows follow."""
+    rows = query.offset(skip).limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
+
+
+def estimate_count(signature: Hashable, count: Callable[[], int]) -> int:
+    """Serve an approximate total from the per-filter cache."""
+    return count_estimates.get_or_set(signature, count)
+
+
+def offset_meta(
+    skip: int,
+    limit: int,
+    total: Optional[int],
+    estimated: bool = False,
+    has_more: Optional[bool] = None
+) -> dict:
+    """Build the response meta for offset pagination."""
+    meta = {
+        "page": (skip // limit) + 1 if limit > 0 else 1,
+        "per_page": limit,
+        "total": total,
+        "total_pages": (total + limit - 1) // limit if total is not None and limit > 0 else None
+    }
+    if estimated:
+        meta["total_estimated"] = True
+    if has_more is not None:
+        meta["has_more"] = has_more
+    return meta
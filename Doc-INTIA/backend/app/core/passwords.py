@@ -0,0 +1,88 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import bcrypt
+from fastapi import HTTPException, status
+
+# bcrypt work factor for new hashes; existing hashes are upgraded on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads dedicated to hashing (bcrypt releases the GIL while it works)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+# Logins verified concurrently per worker, and how long extra ones may wait
+LOGIN_MAX_CONCURRENCY = int(os.getenv("LOGIN_MAX_CONCURRENCY", "8"))
+LOGIN_QUEUE_TIMEOUT = float(os.getenv("LOGIN_QUEUE_TIMEOUT", "2"))
+
+_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+
+
+def hash_password(password: str) -> str:
+    """Hash a password using bcrypt."""
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash using bcrypt."""
+    try:
+        return bcrypt.checkpw(
+            plain_password.encode('utf-8'),
+            hashed_password.encode('utf-8')
+        )
+    except Exception:
+        return False
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """Whether a hash was made with a different work factor than BCRYPT_ROUNDS."""
+    try:
+        return int(hashed_password.split('$')[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the dedicated hashing pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the dedicated hashing pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor, verify_password, plain_password, hashed_password
+    )
+
+
+class LoginAdmission:
+    """Caps concurrent logins; callers that wait too long get a 503."""
+
+    def __init__(
+        self,
+        max_concurrency: int = LOGIN_MAX_CONCURRENCY,
+        queue_timeout: float = LOGIN_QUEUE_TIMEOUT
+    ):
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @asynccontextmanager
+    async def slot(self):
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many login attempts, please retry shortly",
+                headers={"Retry-After": str(max(1, round(self.queue_timeout)))},
+            )
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+
+login_admission = LoginAdmission()
@@ -0,0 +1,221 @@
+"""Check that the services' queries are served by indexes.
+
+Each case runs one query shape the API issues (list filters, keyset pages,
+counts, lookups, the expiry job), captures the SELECTs it emits and
+inspects their EXPLAIN QUERY PLAN. A full scan of a table, or a sort the
+index order should have made unnecessary, fails the check. Unfiltered admin
+lists read tables in primary key order and are not checked.
+
+The cases run against a scratch in-memory SQLite database built by the
+migrations, holding one row per table and no planner statistics, so the
+result depends only on the schema and the queries, not on the data a
+particular database happens to hold.
+
+Run after changing a query or an index with:
+
+    python -m app.core.query_plans check
+"""
+import sys
+from datetime import date
+from typing import Any, Callable, List, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.core.audit import AuditLog
+from app.core.database import Base
+from app.core.expiry import due_policies
+from app.core.migrations import upgrade_database
+from app.core.search import ensure_search_indexes
+from app.core.security import Principal, ROLE_ADMIN, ROLE_AGENT, rotate_refresh_token
+from app.models import Branch, Client, InsurancePolicy, User
+from app.services.client_service import ClientService
+from app.services.policy_service import PolicyService
+
+ADMIN = Principal(id=1, username="admin", role=ROLE_ADMIN)
+AGENT = Principal(id=2, username="agent", role=ROLE_AGENT, branch_id=1)
+
+FULL_SCAN = "SCAN {}"
+ORDER_BY_SORT = "USE TEMP B-TREE FOR ORDER BY"
+
+
+class QueryCase:
+    """A query shape to check; `sorts` allows a sort (e.g. by search rank)."""
+
+    def __init__(self, name: str, run: Callable[[Session], Any], sorts: bool = False):
+        self.name = name
+        self.run = run
+        self.sorts = sorts
+
+
+def _audit_page(**filters) -> Callable[[Session], Any]:
+    # The audit list's query: filters, then most recent first
+    from app.api.v1.endpoints.audit import filter_audit_logs
+
+    def run(db: Session):
+        return filter_audit_logs(db.query(AuditLog.id, AuditLog.timestamp), **filters) \
+            .order_by(AuditLog.timestamp.desc(), AuditLog.id.desc()).limit(21).all()
+    return run
+
+
+CASES = [
+    QueryCase("clients: branch page", lambda db: ClientService(db).get_clients_with_total(AGENT)),
+    QueryCase(
+        "clients: branch keyset page",
+        lambda db: ClientService(db).get_clients_after(AGENT, after_id=1)
+    ),
+    QueryCase(
+        "clients: admin branch filter",
+        lambda db: ClientService(db).get_clients_after(ADMIN, branch_id=1)
+    ),
+    QueryCase("clients: branch count", lambda db: ClientService(db).get_client_count(AGENT)),
+    QueryCase("clients: branch export", lambda db: ClientService(db).export_query(AGENT).all()),
+    QueryCase(
+        "clients: search",
+        lambda db: ClientService(db).get_clients(AGENT, search="dupont"),
+        sorts=True
+    ),
+    QueryCase("clients: detail", lambda db: ClientService(db).get_client_with_policies(1, ADMIN)),
+    QueryCase("clients: detail etag", lambda db: ClientService(db).get_client_etag(1, ADMIN)),
+    QueryCase(
+        "clients: expand=policies",
+        lambda db: ClientService(db).with_policies(ClientService(db).get_clients(AGENT))
+    ),
+    QueryCase("policies: branch page", lambda db: PolicyService(db).get_policies_with_total(AGENT)),
+    QueryCase(
+        "policies: branch keyset page",
+        lambda db: PolicyService(db).get_policies_after(AGENT, after_id=1)
+    ),
+    QueryCase(
+        "policies: branch + status",
+        lambda db: PolicyService(db).get_policies_after(AGENT, status="active")
+    ),
+    QueryCase(
+        "policies: status (admin)",
+        lambda db: PolicyService(db).get_policies_after(ADMIN, status="pending")
+    ),
+    QueryCase(
+        "policies: branch + status count",
+        lambda db: PolicyService(db).get_policy_count(AGENT, status="active")
+    ),
+    QueryCase("policies: client", lambda db: PolicyService(db).get_policies(AGENT, client_id=1)),
+    QueryCase("policies: branch export", lambda db: PolicyService(db).export_query(AGENT).all()),
+    QueryCase(
+        "policies: search",
+        lambda db: PolicyService(db).get_policies(AGENT, search="auto"),
+        sorts=True
+    ),
+    QueryCase("policies: detail", lambda db: PolicyService(db).get_policy_by_id(1, ADMIN)),
+    QueryCase("policies: due for expiry", lambda db: due_policies(db, date.today()).all()),
+    QueryCase("audit: user", _audit_page(user_id=1)),
+    QueryCase("audit: action", _audit_page(action="UPDATE")),
+    QueryCase("audit: resource history", _audit_page(resource_type="client", resource_id=1)),
+    QueryCase("audit: date range", _audit_page(start_date="2024-01-01", end_date="2024-12-31")),
+    QueryCase("auth: refresh token", lambda db: rotate_refresh_token(db, "unknown")),
+]
+
+
+def plan_problems(details: List[str], sorts: bool) -> List[str]:
+    """Plan steps that read a whole table or sort what an index should order."""
+    problems = []
+    for detail in details:
+        if any(detail == FULL_SCAN.format(table) for table in Base.metadata.tables):
+            problems.append(detail)
+        elif detail.startswith(ORDER_BY_SORT) and not sorts:
+            problems.append(detail)
+    return problems
+
+
+def capture_selects(
+    engine: Engine,
+    db: Session,
+    run: Callable[[Session], Any]
+) -> List[Tuple[str, Any]]:
+    """Run a case and return the SELECT statements it executed."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        run(db)
+    except HTTPException:
+        # Not found / forbidden: the query ran, which is all we need
+        pass
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+        db.rollback()
+    return statements
+
+
+def seed(conn: Connection) -> None:
+    """One row per table, so lookups find something and load their relations."""
+    conn.execute(insert(Branch).values(id=1, name="Branch", code="B1", address="-", phone="-"))
+    conn.execute(insert(User).values(
+        id=1, username="admin", email="admin@example.com", password_hash="-", role=ROLE_ADMIN
+    ))
+    conn.execute(insert(Client).values(
+        id=1, branch_id=1, first_name="Jean", last_name="Dupont", email="jean@example.com",
+        phone="-", address="-"
+    ))
+    conn.execute(insert(InsurancePolicy).values(
+        id=1, policy_number="POL-1", client_id=1, branch_id=1, type="Auto", coverage="-",
+        premium=1, start_date=date(2024, 1, 1), end_date=date(2024, 12, 31), status="active"
+    ))
+    conn.execute(insert(AuditLog).values(
+        user_id=1, action="CREATE", resource_type="client", resource_id=1
+    ))
+
+
+def scratch_engine() -> Engine:
+    """An in-memory database at the latest revision, seeded with one row per table."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    upgrade_database(engine)
+    ensure_search_indexes(engine)
+    with engine.begin() as conn:
+        seed(conn)
+    return engine
+
+
+def check(engine: Engine) -> bool:
+    """Check every case; prints each plan problem and returns whether all passed."""
+    passed = True
+    db = Session(bind=engine)
+    try:
+        for case in CASES:
+            problems = []
+            for statement, parameters in capture_selects(engine, db, case.run):
+                with engine.connect() as conn:
+                    details = [
+                        row[3] for row in
+                        conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                    ]
+                problems.extend(
+                    f"{detail}  <- {' '.join(statement.split())[:120]}"
+                    for detail in plan_problems(details, case.sorts)
+                )
+            if problems:
+                passed = False
+                print(f"✗ {case.name}")
+                for problem in problems:
+                    print(f"    {problem}")
+            else:
+                print(f"✓ {case.name}")
+    finally:
+        db.close()
+    return passed
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["check"]:
+        print("Usage: python -m app.core.query_plans check")
+        sys.exit(1)
+    if not check(scratch_engine()):
+        sys.exit(1)
@@ -0,0 +1,104 @@
+"""In-process cache of reference data (branches).
+
+Branches almost never change but are read on every page load, so the
+table is loaded once at startup and kept as ready-to-send JSON bodies with
+their ETags. Any committed ORM write to a Branch drops the snapshot, and
+it is also reloaded after BRANCH_CACHE_TTL seconds so writes made by other
+processes show up eventually.
+"""
+import os
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import SessionLocal
+from app.core.http_cache import Representation, represent
+from app.models.branch import Branch
+from app.schemas.branch import BranchResponse
+
+BRANCH_CACHE_TTL = float(os.getenv("BRANCH_CACHE_TTL", "300"))
+# Browsers may reuse a branch response for this long before revalidating
+BRANCH_CACHE_MAX_AGE = int(os.getenv("BRANCH_CACHE_MAX_AGE", "60"))
+BRANCH_CACHE_CONTROL = f"private, max-age={BRANCH_CACHE_MAX_AGE}"
+
+# Session.info flag set when a flush touched a Branch
+BRANCHES_CHANGED_KEY = "branches_changed"
+
+
+class BranchSnapshot(NamedTuple):
+    listing: Representation
+    by_id: Dict[int, Representation]
+    loaded_at: float
+
+
+class BranchCache:
+    """Serialized branch list and per-branch bodies, rebuilt on demand."""
+
+    def __init__(self, ttl: float = BRANCH_CACHE_TTL):
+        self.ttl = ttl
+        self._snapshot: Optional[BranchSnapshot] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def load(self) -> BranchSnapshot:
+        """Read the branch table and serialize every response once."""
+        generation = self._generation
+        db = SessionLocal()
+        try:
+            branches = db.query(Branch).order_by(Branch.id).all()
+        finally:
+            db.close()
+        items = [BranchResponse.model_validate(branch).model_dump(mode="json") for branch in branches]
+        snapshot = BranchSnapshot(
+            listing=represent(items),
+            by_id={item["id"]: represent(item) for item in items},
+            loaded_at=time.monotonic(),
+        )
+        with self._lock:
+            # Don't install a snapshot read before a concurrent invalidation
+            if generation == self._generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    def current(self) -> Optional[BranchSnapshot]:
+        """The cached snapshot, or None when it was invalidated or is too old."""
+        snapshot = self._snapshot
+        if snapshot is None or time.monotonic() - snapshot.loaded_at > self.ttl:
+            return None
+        return snapshot
+
+    async def get(self) -> BranchSnapshot:
+        """The cached snapshot, reloading it off the event loop on a miss."""
+        snapshot = self.current()
+        if snapshot is None:
+            snapshot = await run_in_threadpool(self.load)
+        return snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+
+branch_cache = BranchCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _track_branch_writes(session: Session, flush_context) -> None:
+    if any(isinstance(obj, Branch) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[BRANCHES_CHANGED_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_branch_cache(session: Session) -> None:
+    if session.info.pop(BRANCHES_CHANGED_KEY, False):
+        branch_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_branch_writes(session: Session) -> None:
+    session.info.pop(BRANCHES_CHANGED_KEY, None)
@@ -0,0 +1,106 @@
+"""Local read replica for SQLite.
+
+Keeps the DATABASE_READ_URL file in sync with the primary through SQLite's
+online backup API, which copies a consistent snapshot while the primary
+stays writable. Meant for local testing of read/write routing; production
+replicas come from the database server's own replication.
+
+Copy once, or keep copying every N seconds:
+
+    python -m app.core.replica sync
+    python -m app.core.replica sync --interval 5
+
+Set REPLICA_SYNC_INTERVAL to run the copy job inside the API process.
+"""
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy.engine import make_url
+
+from app.core.database import DATABASE_URL, DATABASE_READ_URL, is_memory_sqlite, is_sqlite
+
+# Seconds between copies made by the in-process job; 0 disables it
+REPLICA_SYNC_INTERVAL = float(os.getenv("REPLICA_SYNC_INTERVAL", "0"))
+
+
+def sqlite_path(url: str) -> str:
+    """Filesystem path of a file-backed SQLite URL."""
+    if not is_sqlite(url) or is_memory_sqlite(url):
+        raise ValueError(f"Not a file-backed SQLite URL: {url}")
+    return make_url(url).database
+
+
+def copy_database(source_url: str = DATABASE_URL, target_url: Optional[str] = DATABASE_READ_URL) -> float:
+    """Copy the primary into the replica file; returns the copy time in seconds."""
+    if not target_url:
+        raise ValueError("DATABASE_READ_URL is not set")
+    start = time.perf_counter()
+    source = sqlite3.connect(sqlite_path(source_url))
+    target = sqlite3.connect(sqlite_path(target_url))
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    return time.perf_counter() - start
+
+
+class ReplicaSync:
+    """Background thread that copies the primary to the replica periodically."""
+
+    def __init__(self, interval: float = REPLICA_SYNC_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0 and DATABASE_READ_URL is not None
+
+    def start(self) -> None:
+        """Copy once so the replica is current, then keep copying in the background."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._copy()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _copy(self) -> None:
+        try:
+            copy_database()
+        except Exception as e:
+            print(f"✗ Replica sync failed: {e}")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._copy()
+
+
+replica_sync = ReplicaSync()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args[0] != "sync" or len(args) not in (1, 3) \
+            or (len(args) == 3 and args[1] != "--interval"):
+        print("Usage: python -m app.core.replica sync [--interval SECONDS]")
+        sys.exit(1)
+    interval = float(args[2]) if len(args) == 3 else 0
+    while True:
+        elapsed = copy_database()
+        print(f"✓ Copied primary to replica in {elapsed * 1000:.1f} ms")
+        if not interval:
+            break
+        time.sleep(interval)
@@ -0,0 +1,210 @@
+"""Response-level cache for list endpoints.
+
+Rendered list bodies are cached per resource, branch scope and query
+parameters, and concurrent misses for the same key share one load
+(single-flight). Every committed write to a client or policy bumps the
+generation of its branch (and of the all-branches scope), which orphans the
+entries built before it; they age out through the TTL or the LRU.
+
+The default backend is in-process. Set LIST_CACHE_URL to a redis:// URL
+(requires the `redis` package) to share entries and invalidations between
+workers.
+"""
+import json
+import os
+import threading
+from typing import Awaitable, Callable, Optional, Set
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import SingleFlight, TTLCache
+from app.core.database import DATABASE_READ_URL, use_replica
+from app.core.security import ROLE_ADMIN, Principal, effective_branch_id
+from app.core.writer import on_commit
+from app.models.client import Client
+from app.models.policy import InsurancePolicy
+
+# Seconds a cached list page may be served; 0 disables the cache
+LIST_CACHE_TTL = float(os.getenv("LIST_CACHE_TTL", "30"))
+LIST_CACHE_SIZE = int(os.getenv("LIST_CACHE_SIZE", "2048"))
+LIST_CACHE_URL = os.getenv("LIST_CACHE_URL") or None
+
+# Scope name for lists spanning every branch (admins without a branch filter)
+ALL_BRANCHES = "all"
+
+# Scope name for non-admin users without a branch, whose lists are always empty
+NO_BRANCH = "none"
+
+# Session.info key collecting the branches touched by the current transaction
+TOUCHED_BRANCHES_KEY = "list_cache_branches"
+
+
+class MemoryCacheBackend:
+    """In-process backend: an LRU with TTL plus per-scope generations."""
+
+    shared = False
+
+    def __init__(self, maxsize: int = LIST_CACHE_SIZE, ttl: float = LIST_CACHE_TTL):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._entries.get(key)
+
+    def set(self, key: str, value: bytes) -> None:
+        self._entries.set(key, value)
+
+    def generation(self, scope: str) -> int:
+        return self._generations.get(scope, 0)
+
+    def bump(self, scope: str) -> None:
+        with self._lock:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+
+
+class RedisCacheBackend:
+    """Shared backend: rendered bodies and generation counters in Redis."""
+
+    shared = True
+
+    def __init__(self, url: str, ttl: float = LIST_CACHE_TTL, prefix: str = "intia:lists:"):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes) -> None:
+        self._client.set(self.prefix + key, value, px=int(self.ttl * 1000))
+
+    def generation(self, scope: str) -> int:
+        return int(self._client.get(self.prefix + "gen:" + scope) or 0)
+
+    def bump(self, scope: str) -> None:
+        self._client.incr(self.prefix + "gen:" + scope)
+
+
+def create_backend():
+    """The configured backend, falling back to memory if Redis is unavailable."""
+    if LIST_CACHE_URL:
+        try:
+            return RedisCacheBackend(LIST_CACHE_URL)
+        except ImportError:
+            print("List cache: the redis package is not installed, using the in-memory cache")
+    return MemoryCacheBackend()
+
+
+def branch_scope(branch_id: Optional[int]) -> str:
+    return ALL_BRANCHES if branch_id is None else f"branch:{branch_id}"
+
+
+def list_scope(current_user: Principal, branch_id: Optional[int] = None) -> str:
+    """Scope of a list query: only admins may share the all-branches scope."""
+    if current_user.role != ROLE_ADMIN and current_user.branch_id is None:
+        return NO_BRANCH
+    return branch_scope(effective_branch_id(current_user, branch_id))
+
+
+class ResultCache:
+    """Caches rendered list bodies keyed by resource, scope and parameters."""
+
+    def __init__(self, backend=None, ttl: float = LIST_CACHE_TTL):
+        self.backend = backend if backend is not None else create_backend()
+        self.enabled = ttl > 0
+        self.flights = SingleFlight()
+
+    def _key(self, resource: str, scope: str, params: dict) -> str:
+        return f"{resource}|{scope}|{self.backend.generation(scope)}|{json.dumps(params, default=str)}"
+
+    def _lookup(self, key_args: tuple):
+        key = self._key(*key_args)
+        return key, self.backend.get(key) if self.enabled else None
+
+    async def get_or_load(
+        self,
+        resource: str,
+        scope: str,
+        params: dict,
+        load: Callable[[], Awaitable[bytes]],
+        user_id: Optional[int] = None
+    ) -> bytes:
+        """Serve a cached body for this scope and parameters, or load and cache it.
+
+        `scope` is the caller's list scope (see `list_scope`).
+        Identical concurrent misses wait on a single load, so `load` must not
+        depend on the caller's request (open its own session). Users whose
+        reads are pinned to the primary after a write bypass the cache and
+        the coalescing, which may hold pages read from a lagging replica.
+        """
+        if DATABASE_READ_URL and not use_replica(user_id):
+            return await load()
+        if self.backend.shared:
+            key, value = await run_in_threadpool(self._lookup, (resource, scope, params))
+        else:
+            key, value = self._lookup((resource, scope, params))
+        if value is not None:
+            return value
+
+        async def load_and_store() -> bytes:
+            body = await load()
+            if not self.enabled:
+                return body
+            if self.backend.shared:
+                await run_in_threadpool(self.backend.set, key, body)
+            else:
+                self.backend.set(key, body)
+            return body
+
+        return await self.flights.run(key, load_and_store)
+
+    def invalidate_branches(self, branch_ids: Set[Optional[int]]) -> None:
+        """Drop cached lists for these branches and for the all-branches scope."""
+        for branch_id in branch_ids:
+            if branch_id is not None:
+                self.backend.bump(branch_scope(branch_id))
+        self.backend.bump(ALL_BRANCHES)
+
+
+list_cache = ResultCache()
+
+
+def invalidate_on_commit(session: Session, branch_ids: Set[Optional[int]]) -> None:
+    """Invalidate these branches' cached lists once the session commits.
+
+    ORM flushes are tracked automatically; bulk statements that bypass the
+    ORM call this directly.
+    """
+    touched = session.info.get(TOUCHED_BRANCHES_KEY)
+    if touched is None:
+        touched = session.info[TOUCHED_BRANCHES_KEY] = set()
+
+        def invalidate() -> None:
+            if session.info.get(TOUCHED_BRANCHES_KEY) is touched:
+                del session.info[TOUCHED_BRANCHES_KEY]
+            list_cache.invalidate_branches(touched)
+
+        on_commit(session, invalidate)
+    touched.update(branch_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_list_writes(session: Session, flush_context) -> None:
+    branch_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (Client, InsurancePolicy)):
+            history = inspect(obj).attrs.branch_id.history
+            branch_ids.update(history.added or history.unchanged or [obj.branch_id])
+            branch_ids.update(history.deleted or ())
+    if branch_ids:
+        invalidate_on_commit(session, branch_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_list_writes(session: Session) -> None:
+    session.info.pop(TOUCHED_BRANCHES_KEY, None)
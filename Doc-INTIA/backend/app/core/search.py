@@ -0,0 +1,191 @@
+"""Full-text search indexes backed by SQLite FTS5.
+
+Each index is a trigram-tokenized FTS5 table kept in sync with its source
+table by triggers, so every write path (services, seeds, bulk statements)
+updates it incrementally. On other databases, or when FTS5 is unavailable,
+`available` stays False and services fall back to ILIKE filtering.
+
+Rebuild all indexes from scratch with:
+
+    python -m app.core.search rebuild
+"""
+import sys
+from typing import List
+
+from sqlalchemy import column, literal_column, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+# The trigram tokenizer cannot match terms shorter than three characters
+MIN_TERM_LENGTH = 3
+
+
+class SearchIndex:
+    """An FTS5 table whose rowid is the primary key of the indexed row."""
+
+    def __init__(self, name: str, ddl: List[str], rebuild: List[str]):
+        self.name = name
+        self.ddl = ddl
+        self.rebuild_statements = rebuild
+        self.table = table(name, column("rowid"), column("rank"))
+        self.available = False
+
+    @property
+    def rank(self):
+        """BM25 rank of a match; lower is more relevant."""
+        return self.table.c.rank
+
+    def supports(self, term: str) -> bool:
+        """Whether this term can be served by the index."""
+        return self.available and len(term.strip()) >= MIN_TERM_LENGTH
+
+    def filter(self, query, id_column, term: str):
+        """Restrict an ORM query to rows matching the search term."""
+        return query.join(self.table, self.table.c.rowid == id_column).filter(
+            literal_column(self.name).match(match_expression(term))
+        )
+
+
+def match_expression(term: str) -> str:
+    """Quote a user term as a single FTS5 phrase (substring match with trigrams)."""
+    return '"' + term.strip().replace('"', '""') + '"'
+
+
+client_search_index = SearchIndex(
+    name="clients_fts",
+    ddl=[
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5(
+            first_name, last_name, email,
+            content='clients', content_rowid='id', tokenize='trigram'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS clients_fts_ai AFTER INSERT ON clients BEGIN
+            INSERT INTO clients_fts(rowid, first_name, last_name, email)
+            VALUES (new.id, new.first_name, new.last_name, new.email);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS clients_fts_ad AFTER DELETE ON clients BEGIN
+            INSERT INTO clients_fts(clients_fts, rowid, first_name, last_name, email)
+            VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS clients_fts_au
+        AFTER UPDATE OF first_name, last_name, email ON clients BEGIN
+            INSERT INTO clients_fts(clients_fts, rowid, first_name, last_name, email)
+            VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+            INSERT INTO clients_fts(rowid, first_name, last_name, email)
+            VALUES (new.id, new.first_name, new.last_name, new.email);
+        END
+        """,
+    ],
+    rebuild=[
+        "INSERT INTO clients_fts(clients_fts) VALUES ('rebuild')",
+    ],
+)
+
+# Denormalized per-policy search document: the policy's own text columns plus
+# the owning client's name and email, so policy search needs no JOIN.
+policy_search_index = SearchIndex(
+    name="policies_fts",
+    ddl=[
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS policies_fts USING fts5(
+            policy_number, type, coverage, client_name, client_email,
+            tokenize='trigram'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS policies_fts_ai AFTER INSERT ON insurance_policies BEGIN
+            INSERT INTO policies_fts(rowid, policy_number, type, coverage, client_name, client_email)
+            SELECT new.id, new.policy_number, new.type, new.coverage,
+                   c.first_name || ' ' || c.last_name, c.email
+            FROM clients c WHERE c.id = new.client_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS policies_fts_ad AFTER DELETE ON insurance_policies BEGIN
+            DELETE FROM policies_fts WHERE rowid = old.id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS policies_fts_au
+        AFTER UPDATE OF policy_number, type, coverage, client_id ON insurance_policies BEGIN
+            DELETE FROM policies_fts WHERE rowid = old.id;
+            INSERT INTO policies_fts(rowid, policy_number, type, coverage, client_name, client_email)
+            SELECT new.id, new.policy_number, new.type, new.coverage,
+                   c.first_name || ' ' || c.last_name, c.email
+            FROM clients c WHERE c.id = new.client_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS policies_fts_client_au
+        AFTER UPDATE OF first_name, last_name, email ON clients BEGIN
+            UPDATE policies_fts
+            SET client_name = new.first_name || ' ' || new.last_name,
+                client_email = new.email
+            WHERE rowid IN (SELECT id FROM insurance_policies WHERE client_id = new.id);
+        END
+        """,
+    ],
+    rebuild=[
+        "DELETE FROM policies_fts",
+        """
+        INSERT INTO policies_fts(rowid, policy_number, type, coverage, client_name, client_email)
+        SELECT p.id, p.policy_number, p.type, p.coverage,
+               c.first_name || ' ' || c.last_name, c.email
+        FROM insurance_policies p JOIN clients c ON c.id = p.client_id
+        """,
+    ],
+)
+
+SEARCH_INDEXES = [client_search_index, policy_search_index]
+
+
+def ensure_search_indexes(engine: Engine) -> None:
+    """Create missing search indexes and triggers, populating new ones."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    for index in SEARCH_INDEXES:
+        try:
+            with engine.begin() as conn:
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": index.name}
+                ).first() is not None
+                for statement in index.ddl:
+                    conn.execute(text(statement))
+                if not exists:
+                    for statement in index.rebuild_statements:
+                        conn.execute(text(statement))
+        except OperationalError as e:
+            # FTS5 or the trigram tokenizer is not compiled into this SQLite
+            print(f"Search index '{index.name}' unavailable, using ILIKE search: {e.orig}")
+            index.available = False
+        else:
+            index.available = True
+
+
+def rebuild_search_indexes(engine: Engine) -> None:
+    """Rebuild every search index from its source table."""
+    ensure_search_indexes(engine)
+    for index in SEARCH_INDEXES:
+        if not index.available:
+            continue
+        with engine.begin() as conn:
+            for statement in index.rebuild_statements:
+                conn.execute(text(statement))
+        print(f"✓ Rebuilt search index: {index.name}")
+
+
+if __name__ == "__main__":
+    from app.core.database import engine
+
+    if sys.argv[1:] != ["rebuild"]:
+        print("Usage: python -m app.core.search rebuild")
+        sys.exit(1)
+    rebuild_search_indexes(engine)
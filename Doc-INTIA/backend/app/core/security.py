@@ -1,18 +1,44 @@
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Tuple
+import hashlib
+import os
+import secrets
+import threading
+import time
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, ValidationError
 
-from app.core.database import get_db
+from app.core.cache import SingleFlight, TTLCache
+from app.core.database import (
+    run_db, request_session, mark_write, use_replica,
+    SessionLocal, ReadSessionLocal
+)
 from app.models.user import User
+from app.models.refresh_token import RefreshToken
 
 # Security constants
 SECRET_KEY = "your-secret-key-change-in-production"  # TODO: Move to environment variable
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+
+# Cookie names; the refresh cookie is only sent to the auth endpoints
+ACCESS_TOKEN_COOKIE = "token"
+REFRESH_TOKEN_COOKIE = "refresh_token"
+REFRESH_TOKEN_COOKIE_PATH = "/api/v1/auth"
+# Header-based clients (no cookies) send this header set to "true" to get
+# the refresh token in the login/refresh response body; browsers only ever
+# receive it as an HTTP-only cookie
+REFRESH_TOKEN_BODY_HEADER = "X-Refresh-Token-In-Body"
+
+# Seconds between reloads of the per-user revocation state
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "5"))
+# Upper bound on how long a decoded token stays in the principal cache
+PRINCIPAL_CACHE_SECONDS = float(os.getenv("PRINCIPAL_CACHE_SECONDS", "300"))
 
 # Role constants
 ROLE_ADMIN = "ADMIN"
@@ -23,27 +49,211 @@ ROLE_VIEWER = "VIEWER"
 security = HTTPBearer(auto_error=False)
 
 
-class TokenData(BaseModel):
-    username: Optional[str] = None
+class Principal(BaseModel):
+    """Authenticated user as described by the signed access token claims."""
+    model_config = ConfigDict(frozen=True)
+
+    id: int
+    username: str
+    role: str
+    branch_id: Optional[int] = None
+    token_version: int = 0
+
+
+def principal_claims(user: User) -> dict:
+    """Claims embedded in access tokens so requests need no user lookup."""
+    return {
+        "sub": user.username,
+        "uid": user.id,
+        "role": user.role,
+        "branch_id": user.branch_id,
+        "ver": user.token_version or 0,
+    }
 
 
-def verify_token(token: str, credentials_exception: HTTPException) -> TokenData:
-    """Verify and decode JWT token."""
+def verify_token(token: str, credentials_exception: HTTPException) -> Tuple[Principal, float]:
+    """Verify and decode JWT token into its principal and expiry (epoch seconds)."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
+        principal = Principal(
+            id=payload.get("uid"),
+            username=payload.get("sub"),
+            role=payload.get("role"),
+            branch_id=payload.get("branch_id"),
+            token_version=payload.get("ver", 0)
+        )
+    except (JWTError, ValidationError):
+        raise credentials_exception
+    return principal, float(payload["exp"])
+
+
+class RevocationRegistry:
+    """In-memory copy of each user's token version and active flag.
+
+    Reloaded from the users table at most every `refresh_seconds`, so
+    deactivations and revocations made by other processes take effect within
+    that window; changes made through `revoke_user_tokens` apply at once.
+    Ids found missing from the table are remembered for the same window, so
+    tokens of deleted users don't trigger a reload on every request.
+    """
+
+    def __init__(self, refresh_seconds: float = REVOCATION_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._state: Dict[int, Tuple[int, bool]] = {}
+        # User id -> when a reload last found it missing
+        self._missing: Dict[int, float] = {}
+        self._loaded_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def needs_refresh(self, user_id: int) -> bool:
+        """Whether the state is stale or does not know this user yet."""
+        now = time.monotonic()
+        if now - self._loaded_at > self.refresh_seconds:
+            return True
+        if user_id in self._state:
+            return False
+        checked_at = self._missing.get(user_id)
+        return checked_at is None or now - checked_at > self.refresh_seconds
+
+    def refresh(self, db: Session, user_id: Optional[int] = None) -> None:
+        """Reload the state unless another caller just did it for this user.
+
+        The query runs outside the lock: under an AsyncSession it runs on the
+        event loop thread and yields to other requests, which would then
+        block the loop waiting for the lock.
+        """
+        if user_id is not None and not self.needs_refresh(user_id):
+            return
+        rows = db.execute(select(User.id, User.token_version, User.is_active)).all()
+        with self._lock:
+            now = time.monotonic()
+            self._state = {
+                uid: (version or 0, is_active) for uid, version, is_active in rows
+            }
+            self._missing = {
+                uid: checked_at for uid, checked_at in self._missing.items()
+                if uid not in self._state and now - checked_at <= self.refresh_seconds
+            }
+            if user_id is not None and user_id not in self._state:
+                self._missing[user_id] = now
+            self._loaded_at = now
+
+    def state(self, user_id: int) -> Optional[Tuple[int, bool]]:
+        """Return (token_version, is_active) for a user, or None if unknown."""
+        return self._state.get(user_id)
+
+    def update(self, user_id: int, token_version: int, is_active: bool) -> None:
+        """Record a local change without waiting for the next reload."""
+        self._state[user_id] = (token_version, is_active)
+
+    def reset(self) -> None:
+        """Force a reload on the next lookup."""
+        self._loaded_at = float("-inf")
+        self._missing = {}
+
+
+revocations = RevocationRegistry()
+# Coalesces concurrent reloads of the registry for the same user
+revocation_flights = SingleFlight()
+principal_cache = TTLCache(maxsize=10000, ttl=PRINCIPAL_CACHE_SECONDS)
+
+
+def revoke_user_tokens(db: Session, user: User) -> None:
+    """Invalidate every token issued to a user.
+
+    Bumps the token version (access tokens) and revokes all of the user's
+    refresh tokens.
+    """
+    user.token_version = (user.token_version or 0) + 1
+    db.query(RefreshToken).filter(
+        RefreshToken.user_id == user.id,
+        RefreshToken.revoked_at.is_(None)
+    ).update({RefreshToken.revoked_at: datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+    revocations.update(user.id, user.token_version, user.is_active)
+
+
+def as_utc(value: datetime) -> datetime:
+    """An aware UTC datetime; SQLite returns naive values, stored as UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def hash_refresh_token(token: str) -> str:
+    """Refresh tokens are random, so a fast unsalted digest is enough to store them."""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def issue_refresh_token(db: Session, user: User, family_id: Optional[str] = None) -> str:
+    """Create a refresh token for a user; only its hash is stored."""
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user.id,
+        token_hash=hash_refresh_token(token),
+        family_id=family_id or secrets.token_hex(16),
+        expires_at=datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    db.commit()
+    return token
+
+
+def rotate_refresh_token(db: Session, token: str) -> Tuple[User, str]:
+    """Exchange a refresh token for a new one in the same family.
+
+    Each refresh token is single-use: presenting one that was already rotated
+    revokes its whole family, since it means the token was stolen.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    stored = db.query(RefreshToken).filter(
+        RefreshToken.token_hash == hash_refresh_token(token)
+    ).first()
+    if stored is None:
         raise credentials_exception
-    return token_data
+
+    now = datetime.now(timezone.utc)
+    # Mark as used atomically so two concurrent refreshes cannot both succeed
+    claimed = db.query(RefreshToken).filter(
+        RefreshToken.id == stored.id,
+        RefreshToken.revoked_at.is_(None)
+    ).update({RefreshToken.revoked_at: now}, synchronize_session=False)
+    if not claimed:
+        db.query(RefreshToken).filter(
+            RefreshToken.family_id == stored.family_id,
+            RefreshToken.revoked_at.is_(None)
+        ).update({RefreshToken.revoked_at: now}, synchronize_session=False)
+        db.commit()
+        raise credentials_exception
+
+    if as_utc(stored.expires_at) < now:
+        db.commit()
+        raise credentials_exception
+
+    user = db.query(User).filter(User.id == stored.user_id).first()
+    if user is None or not user.is_active:
+        db.commit()
+        raise credentials_exception
+
+    return user, issue_refresh_token(db, user, family_id=stored.family_id)
 
 
-def get_token_from_request(request: Request) -> Optional[str]:
+def revoke_refresh_token(db: Session, token: str) -> None:
+    """Revoke a single refresh token (logout)."""
+    db.query(RefreshToken).filter(
+        RefreshToken.token_hash == hash_refresh_token(token),
+        RefreshToken.revoked_at.is_(None)
+    ).update({RefreshToken.revoked_at: datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+
+
+def get_token_from_request(request: Request, cookie_name: str = ACCESS_TOKEN_COOKIE) -> Optional[str]:
     """Extract token from cookie or Authorization header."""
     # Try cookie first
-    token = request.cookies.get("token")
+    token = request.cookies.get(cookie_name)
     if token:
         return token
     
@@ -55,12 +265,34 @@ def get_token_from_request(request: Request) -> Optional[str]:
     return None
 
 
-def get_current_user(
+def wants_refresh_token_in_body(request: Request) -> bool:
+    """Whether a header-based client asked for the refresh token in the response body."""
+    return request.headers.get(REFRESH_TOKEN_BODY_HEADER, "").lower() == "true"
+
+
+def get_refresh_token_from_request(request: Request) -> Optional[str]:
+    """Extract the refresh token from its cookie or the Authorization header."""
+    return get_token_from_request(request, cookie_name=REFRESH_TOKEN_COOKIE)
+
+
+async def refresh_revocations(user_id: int) -> None:
+    """Reload the revocation registry through a short-lived session."""
+    async with request_session() as db:
+        await run_db(db, revocations.refresh, user_id)
+
+
+async def get_current_user(
     request: Request,
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Dependency to get current authenticated user from cookie or header."""
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+) -> Principal:
+    """Dependency to get current authenticated user from cookie or header.
+
+    The principal comes from the token claims (cached per token); only the
+    revocation registry is consulted, which reloads from the database at
+    most every REVOCATION_REFRESH_SECONDS through a short-lived session, so
+    the request holds no connection once authenticated. Concurrent reloads
+    for the same user share one query.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -69,27 +301,66 @@ def get_current_user(
 
     # Try to get token from cookie or header
     token = get_token_from_request(request)
-    
+
     if not token:
         raise credentials_exception
 
-    token_data = verify_token(token, credentials_exception)
+    principal = principal_cache.get(token)
+    if principal is None:
+        principal, expires_at = verify_token(token, credentials_exception)
+        # Never serve a cached principal past its token's expiry
+        principal_cache.set(
+            token, principal, ttl=min(PRINCIPAL_CACHE_SECONDS, expires_at - time.time())
+        )
+
+    if revocations.needs_refresh(principal.id):
+        await revocation_flights.run(principal.id, lambda: refresh_revocations(principal.id))
 
-    user = db.query(User).filter(User.username == token_data.username).first()
+    state = revocations.state(principal.id)
+    if state is None:
+        raise credentials_exception
 
-    if user is None:
+    token_version, is_active = state
+    if token_version != principal.token_version:
         raise credentials_exception
 
-    if not user.is_active:
+    if not is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user"
         )
 
-    return user
+    return principal
+
+
+async def get_read_request_db(current_user: Principal = Depends(get_current_user)):
+    """Session for async read handlers: the read replica, unless the user
+    wrote recently and must see their own changes."""
+    async with request_session(replica=use_replica(current_user.id)) as db:
+        yield db
 
 
-def check_user_access(current_user: User, branch_id: Optional[int] = None) -> bool:
+async def get_write_request_db(current_user: Principal = Depends(get_current_user)):
+    """Session for async write handlers; pins the user's reads to the primary."""
+    mark_write(current_user.id)
+    try:
+        async with request_session() as db:
+            yield db
+    finally:
+        # Restart the window from the end of the write
+        mark_write(current_user.id)
+
+
+def get_read_db(current_user: Principal = Depends(get_current_user)):
+    """Sync counterpart of get_read_request_db."""
+    db = (ReadSessionLocal if use_replica(current_user.id) else SessionLocal)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def check_user_access(current_user: Principal, branch_id: Optional[int] = None) -> bool:
     """Check if user has access to a specific branch."""
     # Admin users have access to all branches
     if current_user.role == ROLE_ADMIN:
@@ -102,6 +373,13 @@ def check_user_access(current_user: User, branch_id: Optional[int] = None) -> bo
     return current_user.branch_id == branch_id
 
 
+def effective_branch_id(current_user: Principal, branch_id: Optional[int] = None) -> Optional[int]:
+    """Branch a list query is scoped to: the user's own branch unless admin."""
+    if current_user.role != ROLE_ADMIN:
+        return current_user.branch_id
+    return branch_id or None
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -0,0 +1,281 @@
+"""Single-writer queue for SQLite.
+
+SQLite allows one writer at a time; concurrent commits from threadpool
+workers contend on the database lock and fail with "database is locked".
+The WriteQueue funnels write units through one thread that owns one
+connection. Each unit is a callable `fn(session)` run in its own SAVEPOINT,
+so a failing unit only undoes its own work, and the units collected in one
+pass share a single COMMIT (group commit). Callers wait on a future; reads
+keep using the regular pool.
+"""
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.database import (
+    DATABASE_URL, DB_POOL_PRE_PING, RequestSession, configure_engine, is_memory_sqlite,
+    is_sqlite, run_db
+)
+
+# Route client, policy and audit writes through the writer thread (SQLite only)
+SQLITE_WRITE_QUEUE = os.getenv("SQLITE_WRITE_QUEUE", "true").lower() in ("1", "true", "yes")
+WRITE_QUEUE_SIZE = int(os.getenv("WRITE_QUEUE_SIZE", "1000"))
+# Most units committed together, and how long to wait for more to arrive
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "64"))
+WRITE_GROUP_WINDOW = float(os.getenv("WRITE_GROUP_WINDOW", "0.002"))
+
+# Session.info flag set on the sessions that run write units
+WRITE_UNIT_KEY = "write_unit"
+# Session.info keys holding on_commit callbacks, before and after the commit
+ON_COMMIT_KEY = "on_commit"
+COMMITTED_CALLBACKS_KEY = "on_commit_committed"
+
+
+def on_commit(session: Session, callback: Callable[[], None]) -> None:
+    """Run `callback` once the session's current transaction is durably committed.
+
+    Callbacks are dropped if the transaction rolls back. Inside a write unit
+    they wait for the group commit, not just the unit's savepoint.
+    """
+    session.info.setdefault(ON_COMMIT_KEY, []).append(callback)
+
+
+def run_callbacks(callbacks: List[Callable[[], None]]) -> None:
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception as e:
+            print(f"✗ Commit callback failed: {e}")
+
+
+@event.listens_for(Session, "after_commit")
+def _run_on_commit(session: Session) -> None:
+    callbacks = session.info.pop(ON_COMMIT_KEY, None)
+    if not callbacks:
+        return
+    if session.info.get(WRITE_UNIT_KEY):
+        # Only the unit's savepoint was released; _commit_group runs these
+        session.info.setdefault(COMMITTED_CALLBACKS_KEY, []).extend(callbacks)
+        return
+    run_callbacks(callbacks)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_commit(session: Session) -> None:
+    session.info.pop(ON_COMMIT_KEY, None)
+
+
+def write_queue_supported(url: str = DATABASE_URL) -> bool:
+    """Whether writes to this database should go through the writer thread."""
+    return SQLITE_WRITE_QUEUE and is_sqlite(url) and not is_memory_sqlite(url)
+
+
+def create_writer_engine(url: str = DATABASE_URL) -> Engine:
+    """One-connection engine whose transactions start with BEGIN IMMEDIATE.
+
+    pysqlite's own transaction handling is turned off so that SAVEPOINTs work
+    and the write lock is taken up front instead of on the first statement.
+    """
+    writer_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=1,
+        max_overflow=0,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    configure_engine(writer_engine, url)
+
+    @event.listens_for(writer_engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(writer_engine, "begin")
+    def _begin_immediate(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return writer_engine
+
+
+class WriteQueue:
+    """Dedicated writer thread that group-commits queued write units."""
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        maxsize: int = WRITE_QUEUE_SIZE,
+        batch_size: int = WRITE_BATCH_SIZE,
+        group_window: float = WRITE_GROUP_WINDOW
+    ):
+        self.batch_size = batch_size
+        self.group_window = group_window
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._engine: Optional[Engine] = None
+        self._lock = threading.Lock()
+        self.units = 0
+        self.groups = 0
+        self.failed_groups = 0
+        self.total_commit_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, url: str = DATABASE_URL) -> None:
+        """Open the writer connection and start the writer thread."""
+        if self.running:
+            return
+        self._engine = create_writer_engine(url)
+        self._thread = threading.Thread(
+            target=self._run, name="sqlite-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Run every queued unit, then stop the writer thread."""
+        if not self.running:
+            return
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+        self._thread = None
+        self._engine.dispose()
+        self._engine = None
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue `fn(session, *args, **kwargs)`; the future holds its result."""
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((future, fn, args, kwargs))
+        except queue.Full:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many pending writes, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        return future
+
+    def execute(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a write unit and block until its group is committed."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("A write unit cannot wait on the write queue")
+        return self.submit(fn, *args, **kwargs).result()
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a write unit and await its group commit."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def snapshot(self) -> dict:
+        """Queue depth and group commit counters."""
+        with self._lock:
+            return {
+                "running": self.running,
+                "pending": self._queue.qsize(),
+                "units": self.units,
+                "groups": self.groups,
+                "failed_groups": self.failed_groups,
+                "avg_group_size": round(self.units / self.groups, 2) if self.groups else 0.0,
+                "avg_commit_ms": round(self.total_commit_seconds / self.groups * 1000, 3)
+                if self.groups else 0.0,
+            }
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            group = [item]
+            deadline = time.monotonic() + self.group_window
+            while len(group) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                group.append(item)
+            self._commit_group(group)
+
+        # Run anything enqueued after the stop marker
+        group = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not self._STOP:
+                group.append(item)
+        for start in range(0, len(group), self.batch_size):
+            self._commit_group(group[start:start + self.batch_size])
+
+    def _commit_group(self, group: List[Tuple[Future, Callable, tuple, dict]]) -> None:
+        """Run each unit in its own savepoint and commit them together."""
+        group = [unit for unit in group if unit[0].set_running_or_notify_cancel()]
+        if not group:
+            return
+        outcomes = []
+        start = time.perf_counter()
+        try:
+            with self._engine.connect() as connection:
+                with connection.begin():
+                    for future, fn, args, kwargs in group:
+                        outcomes.append((future, *self._run_unit(connection, fn, args, kwargs)))
+        except Exception as e:
+            # BEGIN or COMMIT failed: nothing in the group was written
+            with self._lock:
+                self.failed_groups += 1
+            for future, _, _, _ in group:
+                future.set_exception(e)
+            return
+        with self._lock:
+            self.units += len(group)
+            self.groups += 1
+            self.total_commit_seconds += time.perf_counter() - start
+        for future, result, error, callbacks in outcomes:
+            run_callbacks(callbacks)
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _run_unit(self, connection, fn: Callable, args: tuple, kwargs: dict):
+        # commit() and rollback() inside the unit release or roll back its
+        # savepoint; the enclosing transaction is committed by _commit_group
+        session = Session(
+            bind=connection,
+            join_transaction_mode="create_savepoint",
+            autoflush=False,
+            expire_on_commit=False,
+            info={WRITE_UNIT_KEY: True},
+        )
+        try:
+            result, error = fn(session, *args, **kwargs), None
+        except Exception as e:
+            result, error = None, e
+        # Detach results so callers can read them from other threads
+        session.close()
+        return result, error, session.info.get(COMMITTED_CALLBACKS_KEY, [])
+
+
+write_queue = WriteQueue()
+
+
+async def run_write(db: RequestSession, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a write unit `fn(session, *args, **kwargs)` on the writer thread.
+
+    Falls back to run_db on the request session when the queue is not running.
+    """
+    if write_queue.running:
+        return await write_queue.run(fn, *args, **kwargs)
+    return await run_db(db, fn, *args, **kwargs)
@@ -2,6 +2,7 @@ from app.models.branch import Branch
 from app.models.user import User
 from app.models.client import Client
 from app.models.policy import InsurancePolicy
+from app.models.refresh_token import RefreshToken
 from app.core.audit import AuditLog
 
-__all__ = ["Branch", "User", "Client", "InsurancePolicy", "AuditLog"]
+__all__ = ["Branch", "User", "Client", "InsurancePolicy", "RefreshToken", "AuditLog"]
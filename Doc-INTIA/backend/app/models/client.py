@@ -1,12 +1,13 @@
-from sqlalchemy import Column, Integer, String, DateTime, Date, func, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Date, func, ForeignKey, Index
 from sqlalchemy.orm import relationship
+from datetime import datetime
 from app.core.database import Base
 
 class Client(Base):
     __tablename__ = "clients"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    branch_id = Column(Integer, ForeignKey("branches.id"), nullable=False, index=True)
+    branch_id = Column(Integer, ForeignKey("branches.id"), nullable=False)
     first_name = Column(String(50), nullable=False)
     last_name = Column(String(50), nullable=False)
     email = Column(String(255), nullable=False, unique=True, index=True)
@@ -14,7 +15,17 @@ class Client(Base):
     address = Column(String, nullable=False)
     date_of_birth = Column(Date, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    # Set in Python on update: microsecond precision keeps it usable as a row version (ETags)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=datetime.utcnow, nullable=False)
+
+    # Indexes matched to the list queries (see app.core.query_plans)
+    __table_args__ = (
+        # Branch-scoped lists, in id (keyset) order
+        Index("ix_clients_branch_id_id", "branch_id", "id"),
+    )
+
+    # Fetch server-generated timestamps with RETURNING on insert and update
+    __mapper_args__ = {"eager_defaults": True}
 
     # Relationships
     branch = relationship("Branch", back_populates="clients")
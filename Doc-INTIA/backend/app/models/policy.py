@@ -1,33 +1,67 @@
-from sqlalchemy import Column, Integer, String, DateTime, Date, Numeric, Text, func, ForeignKey, CheckConstraint
+from sqlalchemy import (
+    Column, Integer, String, DateTime, Date, Numeric, Text, func, ForeignKey, CheckConstraint, Index,
+    bindparam
+)
 from sqlalchemy.orm import relationship
+from datetime import datetime
 from app.core.database import Base
 
+# Statuses a policy moves to 'expired' from once its end date has passed
+EXPIRABLE_STATUSES = ("active", "pending")
+
+
 class InsurancePolicy(Base):
     __tablename__ = "insurance_policies"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     policy_number = Column(String(50), nullable=False, unique=True, index=True)
     client_id = Column(Integer, ForeignKey("clients.id"), nullable=False, index=True)
-    branch_id = Column(Integer, ForeignKey("branches.id"), nullable=False, index=True)
+    branch_id = Column(Integer, ForeignKey("branches.id"), nullable=False)
     type = Column(String(100), nullable=False)
     coverage = Column(Text, nullable=False)
     premium = Column(Numeric(10, 2), nullable=False)
     start_date = Column(Date, nullable=False, index=True)
-    end_date = Column(Date, nullable=False, index=True)
+    end_date = Column(Date, nullable=False)
     status = Column(String(20), nullable=False, default="pending")
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    # Set in Python on update: microsecond precision keeps it usable as a row version (ETags)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=datetime.utcnow, nullable=False)
 
-    # Constraints
+    # Constraints, and indexes matched to the list and expiry queries (see app.core.query_plans)
     __table_args__ = (
         CheckConstraint("end_date > start_date", name="check_end_date_after_start"),
         CheckConstraint("status IN ('active', 'pending', 'cancelled', 'expired')", name="check_valid_status"),
         CheckConstraint("premium > 0", name="check_positive_premium"),
+        # Branch-scoped lists, in id (keyset) order
+        Index("ix_insurance_policies_branch_id_id", "branch_id", "id"),
+        # Status filter within a branch, and alone (admins), in id order
+        Index("ix_insurance_policies_branch_id_status_id", "branch_id", "status", "id"),
+        Index("ix_insurance_policies_status_id", "status", "id"),
     )
 
+    # Fetch server-generated timestamps with RETURNING on insert and update
+    __mapper_args__ = {"eager_defaults": True}
+
     # Relationships
     client = relationship("Client", back_populates="policies")
     branch = relationship("Branch", back_populates="policies")
 
     def __repr__(self):
         return f"<InsurancePolicy(id={self.id}, policy_number='{self.policy_number}', client_id={self.client_id}, status='{self.status}')>"
+
+
+# Policies the expiry job still has to look at. The statuses are rendered
+# inline: SQLite only uses a partial index when the query repeats its WHERE
+# term literally, which bound parameters don't.
+is_expirable = InsurancePolicy.status.in_(
+    bindparam("expirable_statuses", EXPIRABLE_STATUSES, expanding=True, literal_execute=True)
+)
+
+# Due policies in expiry order; stays small since expired rows leave it
+Index(
+    "ix_insurance_policies_expiry_due",
+    InsurancePolicy.end_date,
+    InsurancePolicy.id,
+    sqlite_where=is_expirable,
+    postgresql_where=is_expirable
+)
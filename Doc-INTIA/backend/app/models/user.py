@@ -12,12 +12,15 @@ class User(Base):
     role = Column(String(20), nullable=False)  # ADMIN, AGENT, VIEWER
     branch_id = Column(Integer, ForeignKey("branches.id"), nullable=True)  # Null for ADMIN users
     is_active = Column(Boolean, default=True, nullable=False)
+    # Bumped to revoke every token issued to this user
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Relationships
     branch = relationship("Branch", back_populates="users")
     audit_logs = relationship("AuditLog", back_populates="user")
+    refresh_tokens = relationship("RefreshToken", back_populates="user")
 
     def __repr__(self):
         return f"<User(id={self.id}, username='{self.username}', role='{self.role}')>"
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr, ConfigDict
 from typing import Optional
 from datetime import date, datetime
+from decimal import Decimal
 
 
 class ClientBase(BaseModel):
@@ -40,3 +41,26 @@ class ClientList(BaseModel):
 
     data: list[ClientResponse]
     meta: dict
+
+
+class ClientPolicySummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    policy_number: str
+    type: str
+    status: str
+    premium: Decimal
+    start_date: date
+    end_date: date
+
+
+class ClientWithPolicies(ClientResponse):
+    policies: list[ClientPolicySummary] = []
+
+
+class ClientWithPoliciesList(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    data: list[ClientWithPolicies]
+    meta: dict
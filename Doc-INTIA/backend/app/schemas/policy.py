@@ -1,5 +1,5 @@
-from pydantic import BaseModel, model_validator, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator, ConfigDict
+from typing import List, Optional
 from datetime import date, datetime
 from decimal import Decimal
 
@@ -40,6 +40,11 @@ class PolicyUpdate(BaseModel):
         return self
 
 
+class PolicyBulkStatusUpdate(BaseModel):
+    policy_ids: List[int] = Field(..., min_length=1, max_length=5000)
+    status: str = Field(..., pattern="^(active|pending|cancelled|expired)$")
+
+
 class PolicyResponse(PolicyBase):
     model_config = ConfigDict(from_attributes=True)
 
@@ -1,28 +1,62 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
-from typing import List, Optional, Dict, Any
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import or_, and_, insert
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 from fastapi import HTTPException, status
 
+from app.models.branch import Branch
 from app.models.client import Client
-from app.models.user import User
 from app.models.policy import InsurancePolicy
-from app.schemas.client import ClientCreate, ClientUpdate, ClientResponse
-from app.core.security import check_user_access, ROLE_ADMIN
-from app.core.audit import log_action, ACTION_CREATE, ACTION_UPDATE, ACTION_DELETE, RESOURCE_CLIENT
+from app.schemas.client import ClientCreate, ClientUpdate, ClientResponse, ClientPolicySummary
+from app.schemas.bulk import BulkRowError
+from app.core.database import is_unique_violation, run_db, RequestSession
+from app.core.security import Principal, check_user_access, ROLE_ADMIN
+from app.core.pagination import fetch_with_total, estimate_count
+from app.core.http_cache import version_etag, check_if_match
+from app.core.search import client_search_index
+from app.core.writer import run_write
+from app.core.bulk import ValidRow
+from app.core.result_cache import invalidate_on_commit, list_scope
+from app.core.audit import (
+    log_action, log_actions, ACTION_CREATE, ACTION_UPDATE, ACTION_DELETE, RESOURCE_CLIENT
+)
+
+# Fields a client list can return (the ClientResponse fields), loaded as plain
+# rows of just those columns instead of ORM instances
+CLIENT_LIST_FIELDS = tuple(ClientResponse.model_fields)
+
+
+def client_list_columns(fields: Sequence[str]) -> list:
+    return [getattr(Client, field) for field in fields]
+
+
+# Policy columns shown with a client (detail and expand=policies), plus the
+# row version the detail ETag is built from
+CLIENT_POLICY_COLUMNS = [
+    getattr(InsurancePolicy, field) for field in ClientPolicySummary.model_fields
+] + [InsurancePolicy.updated_at]
+
+
+def client_detail_etag(client: Client, policies: List[InsurancePolicy]) -> str:
+    """Entity tag of a client detail: its own and its policies' row versions."""
+    return version_etag(
+        "client", client.id, client.updated_at,
+        *sorted((policy.id, policy.updated_at) for policy in policies)
+    )
+
 
 class ClientService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_clients(
+    def _filtered_query(
         self,
-        current_user: User,
-        skip: int = 0,
-        limit: int = 20,
+        current_user: Principal,
         search: Optional[str] = None,
         branch_id: Optional[int] = None
-    ) -> List[Client]:
-        """Get clients with filtering and access control."""
+    ):
+        """Build the client query with access control and filters applied."""
         query = self.db.query(Client)
 
         # Apply access control
@@ -33,8 +67,10 @@ class ClientService:
             # Admin can filter by specific branch
             query = query.filter(Client.branch_id == branch_id)
 
-        # Apply search filter
-        if search:
+        # Apply search filter, through the full-text index when possible
+        if search and client_search_index.supports(search):
+            query = client_search_index.filter(query, Client.id, search)
+        elif search:
             search_filter = f"%{search}%"
             query = query.filter(
                 or_(
@@ -44,39 +80,107 @@ class ClientService:
                 )
             )
 
+        return query
+
+    def get_clients(
+        self,
+        current_user: Principal,
+        skip: int = 0,
+        limit: int = 20,
+        search: Optional[str] = None,
+        branch_id: Optional[int] = None,
+        fields: Sequence[str] = CLIENT_LIST_FIELDS
+    ) -> List[Row]:
+        """Get clients with filtering and access control, as rows of the given fields."""
+        query = self._list_query(current_user, search=search, branch_id=branch_id, fields=fields)
         return query.offset(skip).limit(limit).all()
 
+    def get_clients_with_total(
+        self,
+        current_user: Principal,
+        skip: int = 0,
+        limit: int = 20,
+        search: Optional[str] = None,
+        branch_id: Optional[int] = None,
+        fields: Sequence[str] = CLIENT_LIST_FIELDS
+    ) -> Tuple[List[Row], int]:
+        """Get a page of client rows and the filtered total in one query."""
+        query = self._list_query(current_user, search=search, branch_id=branch_id, fields=fields)
+        return fetch_with_total(query, skip, limit)
+
+    def _list_query(
+        self,
+        current_user: Principal,
+        search: Optional[str] = None,
+        branch_id: Optional[int] = None,
+        fields: Sequence[str] = CLIENT_LIST_FIELDS
+    ):
+        """Filtered client query in list order, projected to the requested fields."""
+        query = self._filtered_query(current_user, search=search, branch_id=branch_id)
+        if search and client_search_index.supports(search):
+            # Most relevant matches first
+            query = query.order_by(client_search_index.rank, Client.id)
+        return query.with_entities(*client_list_columns(fields))
+
+    def get_clients_after(
+        self,
+        current_user: Principal,
+        after_id: Optional[int] = None,
+        limit: int = 20,
+        search: Optional[str] = None,
+        branch_id: Optional[int] = None,
+        fields: Sequence[str] = CLIENT_LIST_FIELDS
+    ) -> List[Row]:
+        """Get client rows ordered by id, starting after a keyset cursor.
+
+        Fetches one extra row so the caller can tell whether a next page exists.
+        """
+        query = self._filtered_query(current_user, search=search, branch_id=branch_id)
+        if after_id is not None:
+            query = query.filter(Client.id > after_id)
+        return query.with_entities(*client_list_columns(fields)) \
+            .order_by(Client.id).limit(limit + 1).all()
+
+    def export_query(
+        self,
+        current_user: Principal,
+        search: Optional[str] = None,
+        branch_id: Optional[int] = None,
+        fields: Sequence[str] = CLIENT_LIST_FIELDS
+    ):
+        """Every client the list would show, in id order, projected to the given fields."""
+        query = self._filtered_query(current_user, search=search, branch_id=branch_id)
+        return query.with_entities(*client_list_columns(fields)).order_by(Client.id)
+
     def get_client_count(
         self,
-        current_user: User,
+        current_user: Principal,
         search: Optional[str] = None,
         branch_id: Optional[int] = None
     ) -> int:
         """Get total count of clients for pagination."""
-        query = self.db.query(Client)
-
-        # Apply access control
-        if current_user.role != ROLE_ADMIN:
-            query = query.filter(Client.branch_id == current_user.branch_id)
-        elif branch_id:
-            query = query.filter(Client.branch_id == branch_id)
+        query = self._filtered_query(current_user, search=search, branch_id=branch_id)
+        return query.count()
 
-        # Apply search filter
-        if search:
-            search_filter = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Client.first_name.ilike(search_filter),
-                    Client.last_name.ilike(search_filter),
-                    Client.email.ilike(search_filter)
-                )
-            )
+    def get_client_count_estimate(
+        self,
+        current_user: Principal,
+        search: Optional[str] = None,
+        branch_id: Optional[int] = None
+    ) -> int:
+        """Get an approximate client count, cached per filter signature."""
+        signature = ("clients", list_scope(current_user, branch_id), search or None)
+        return estimate_count(
+            signature,
+            lambda: self.get_client_count(current_user, search=search, branch_id=branch_id)
+        )
 
-        return query.count()
+    def get_client_by_id(self, client_id: int, current_user: Principal, *options) -> Client:
+        """Get a specific client by ID with access control.
 
-    def get_client_by_id(self, client_id: int, current_user: User) -> Client:
-        """Get a specific client by ID with access control."""
-        client = self.db.query(Client).filter(Client.id == client_id).first()
+        `options` are loader options for the query, e.g. eager loads.
+        """
+        client = self.db.query(Client).options(*options).filter(Client.id == client_id).first()
 
         if not client:
             raise HTTPException(
@@ -93,7 +197,61 @@ class ClientService:
 
         return client
 
-    def create_client(self, client_data: ClientCreate, current_user: User) -> Client:
+    def get_client_etag(self, client_id: int, current_user: Principal) -> str:
+        """Entity tag of a client detail from row versions only, without loading it."""
+        row = self.db.query(Client.id, Client.branch_id, Client.updated_at) \
+            .filter(Client.id == client_id).first()
+
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Client not found"
+            )
+
+        if not check_user_access(current_user, branch_id=row.branch_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied to this client"
+            )
+
+        versions = self.db.query(InsurancePolicy.id, InsurancePolicy.updated_at) \
+            .filter(InsurancePolicy.client_id == client_id) \
+            .order_by(InsurancePolicy.id).all()
+        return version_etag("client", row.id, row.updated_at, *(tuple(v) for v in versions))
+
+    def get_client_with_policies(
+        self,
+        client_id: int,
+        current_user: Principal
+    ) -> Tuple[Client, List[InsurancePolicy]]:
+        """Get a client and its policies with access control.
+
+        The policies come with the client through selectinload, limited to
+        the columns the detail shows.
+        """
+        client = self.get_client_by_id(
+            client_id,
+            current_user,
+            selectinload(Client.policies).load_only(*CLIENT_POLICY_COLUMNS)
+        )
+        return client, sorted(client.policies, key=lambda policy: policy.id)
+
+    def with_policies(self, clients: List[Row]) -> List[Dict[str, Any]]:
+        """Attach each listed client's policies, loaded in one query for the page."""
+        policies: Dict[int, list] = {}
+        client_ids = [client.id for client in clients]
+        if client_ids:
+            rows = self.db.query(InsurancePolicy.client_id, *CLIENT_POLICY_COLUMNS) \
+                .filter(InsurancePolicy.client_id.in_(client_ids)) \
+                .order_by(InsurancePolicy.client_id, InsurancePolicy.id)
+            for row in rows:
+                policies.setdefault(row.client_id, []).append(row)
+        return [
+            {**client._mapping, "policies": policies.get(client.id, [])}
+            for client in clients
+        ]
+
+    def create_client(self, client_data: ClientCreate, current_user: Principal) -> Client:
         """Create a new client."""
         # Check if user can create clients for this branch
         if not check_user_access(current_user, branch_id=client_data.branch_id):
@@ -102,41 +260,108 @@ class ClientService:
                 detail="Cannot create clients for this branch"
             )
 
-        # Check for duplicate email
-        existing_client = self.db.query(Client).filter(Client.email == client_data.email).first()
-        if existing_client:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Client with this email already exists"
-            )
-
-        # Create client
+        # Create client; the unique constraint on email rejects duplicates
         client_dict = client_data.model_dump()
         client = Client(**client_dict)
         self.db.add(client)
-        self.db.commit()
-        self.db.refresh(client)
+        self._flush()
 
-        # Log creation
+        # Log creation in the same transaction
         log_action(
             db_session=self.db,
             user_id=current_user.id,
             action=ACTION_CREATE,
             resource_type=RESOURCE_CLIENT,
             resource_id=client.id,
-            new_values=client_dict
+            new_values=client_dict,
+            commit=False
         )
+        self._commit()
 
         return client
 
+    def import_clients(
+        self,
+        rows: List[ValidRow],
+        current_user: Principal
+    ) -> Tuple[int, List[BulkRowError]]:
+        """Create a chunk of validated clients with set-based checks and inserts.
+
+        Rows for other branches, unknown branches or emails that already exist
+        (in the database or earlier in the chunk) are skipped and reported.
+        The rest are inserted and audited together; if a constraint still
+        rejects them (a concurrent write), the chunk is rolled back and each
+        of its rows reported. Returns the number created and the errors.
+        """
+        errors: List[BulkRowError] = []
+        emails = {client_data.email for _, client_data in rows}
+        existing_emails = {
+            email for (email,) in self.db.query(Client.email).filter(Client.email.in_(emails))
+        }
+        branch_ids = {client_data.branch_id for _, client_data in rows}
+        known_branches = {
+            branch_id for (branch_id,) in self.db.query(Branch.id).filter(Branch.id.in_(branch_ids))
+        }
+
+        accepted, accepted_rows = [], []
+        for row_number, client_data in rows:
+            if not check_user_access(current_user, branch_id=client_data.branch_id):
+                message = "Cannot create clients for this branch"
+            elif client_data.branch_id not in known_branches:
+                message = "Branch not found"
+            elif client_data.email in existing_emails:
+                message = "Client with this email already exists"
+            else:
+                existing_emails.add(client_data.email)
+                accepted.append(client_data.model_dump())
+                accepted_rows.append((row_number, client_data.email))
+                continue
+            errors.append(BulkRowError(row=row_number, key=client_data.email, errors=[message]))
+
+        if accepted:
+            try:
+                created_ids = self.db.scalars(
+                    insert(Client).returning(Client.id, sort_by_parameter_order=True), accepted
+                ).all()
+                log_actions(
+                    db_session=self.db,
+                    user_id=current_user.id,
+                    action=ACTION_CREATE,
+                    resource_type=RESOURCE_CLIENT,
+                    changes=[
+                        (client_id, None, client_dict)
+                        for client_id, client_dict in zip(created_ids, accepted)
+                    ]
+                )
+                # Bulk inserts bypass the ORM flush that tracks list cache writes
+                invalidate_on_commit(self.db, {client_dict["branch_id"] for client_dict in accepted})
+                self.db.commit()
+            except IntegrityError as e:
+                self.db.rollback()
+                detail = self._integrity_error_detail(e)
+                errors.extend(
+                    BulkRowError(row=row_number, key=email, errors=[detail])
+                    for row_number, email in accepted_rows
+                )
+                return 0, errors
+
+        return len(accepted), errors
+
     def update_client(
         self,
         client_id: int,
         client_data: ClientUpdate,
-        current_user: User
+        current_user: Principal,
+        if_match: Optional[str] = None
     ) -> Client:
-        """Update an existing client."""
+        """Update an existing client.
+
+        With `if_match`, the update only applies if the client detail still
+        has that entity tag.
+        """
         client = self.get_client_by_id(client_id, current_user)
+        if if_match is not None:
+            check_if_match(if_match, client_detail_etag(client, client.policies), "Client")
 
         # Check if user can update clients for this branch
         update_data = client_data.model_dump(exclude_unset=True)
@@ -147,17 +372,6 @@ class ClientService:
                 detail="Cannot update clients for this branch"
             )
 
-        # Check for duplicate email if email is being updated
-        if 'email' in update_data and update_data['email'] != client.email:
-            existing_client = self.db.query(Client).filter(
-                and_(Client.email == update_data['email'], Client.id != client_id)
-            ).first()
-            if existing_client:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Client with this email already exists"
-                )
-
         # Store old values for audit
         old_values = {
             'branch_id': client.branch_id,
@@ -172,11 +386,9 @@ class ClientService:
         # Update client
         for field, value in update_data.items():
             setattr(client, field, value)
+        self._flush()
 
-        self.db.commit()
-        self.db.refresh(client)
-
-        # Log update
+        # Log update in the same transaction
         log_action(
             db_session=self.db,
             user_id=current_user.id,
@@ -184,12 +396,14 @@ class ClientService:
             resource_type=RESOURCE_CLIENT,
             resource_id=client.id,
             old_values=old_values,
-            new_values=update_data
+            new_values=update_data,
+            commit=False
         )
+        self._commit()
 
         return client
 
-    def delete_client(self, client_id: int, current_user: User) -> bool:
+    def delete_client(self, client_id: int, current_user: Principal) -> bool:
         """Delete a client if no active policies exist."""
         client = self.get_client_by_id(client_id, current_user)
 
@@ -218,18 +432,116 @@ class ClientService:
             'date_of_birth': client.date_of_birth.isoformat() if client.date_of_birth else None
         }
 
-        # Delete client
+        # Delete client and log deletion in one transaction
         self.db.delete(client)
-        self.db.commit()
-
-        # Log deletion
         log_action(
             db_session=self.db,
             user_id=current_user.id,
             action=ACTION_DELETE,
             resource_type=RESOURCE_CLIENT,
             resource_id=client_id,
-            old_values=old_values
+            old_values=old_values,
+            commit=False
         )
+        self._commit()
 
         return True
+
+    def _flush(self) -> None:
+        """Flush pending changes, mapping constraint violations to HTTP errors."""
+        try:
+            self.db.flush()
+        except IntegrityError as e:
+            self._raise_integrity_error(e)
+
+    def _commit(self) -> None:
+        """Commit the unit of work, mapping constraint violations to HTTP errors."""
+        try:
+            self.db.commit()
+        except IntegrityError as e:
+            self._raise_integrity_error(e)
+
+    def _integrity_error_detail(self, error: IntegrityError) -> str:
+        if is_unique_violation(error, "clients", "email"):
+            return "Client with this email already exists"
+        return "Client violates a database constraint"
+
+    def _raise_integrity_error(self, error: IntegrityError) -> None:
+        self.db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=self._integrity_error_detail(error)
+        )
+
+
+
+class AsyncClientService:
+    """Awaitable ClientService for async endpoints.
+
+    Business rules stay in ClientService; each call runs it through run_db,
+    on the async driver or on the threadpool depending on DATABASE_ASYNC.
+    Writes go through the SQLite write queue when it is running.
+    """
+
+    def __init__(self, db: RequestSession):
+        self.db = db
+
+    async def _run(self, method: Callable[..., Any], *args, **kwargs):
+        # `method` is an unbound ClientService method, bound to a service on the session
+        return await run_db(self.db, lambda session: method(ClientService(session), *args, **kwargs))
+
+    async def _write(self, method: Callable[..., Any], *args, **kwargs):
+        return await run_write(self.db, lambda session: method(ClientService(session), *args, **kwargs))
+
+    async def get_clients(self, current_user: Principal, **filters) -> List[Row]:
+        return await self._run(ClientService.get_clients, current_user, **filters)
+
+    async def get_clients_with_total(self, current_user: Principal, **filters) -> Tuple[List[Row], int]:
+        return await self._run(ClientService.get_clients_with_total, current_user, **filters)
+
+    async def get_clients_after(self, current_user: Principal, **filters) -> List[Row]:
+        return await self._run(ClientService.get_clients_after, current_user, **filters)
+
+    async def get_client_count(self, current_user: Principal, **filters) -> int:
+        return await self._run(ClientService.get_client_count, current_user, **filters)
+
+    async def get_client_count_estimate(self, current_user: Principal, **filters) -> int:
+        return await self._run(ClientService.get_client_count_estimate, current_user, **filters)
+
+    async def with_policies(self, clients: List[Row]) -> List[Dict[str, Any]]:
+        return await self._run(ClientService.with_policies, clients)
+
+    async def get_client_by_id(self, client_id: int, current_user: Principal) -> Client:
+        return await self._run(ClientService.get_client_by_id, client_id, current_user)
+
+    async def get_client_etag(self, client_id: int, current_user: Principal) -> str:
+        return await self._run(ClientService.get_client_etag, client_id, current_user)
+
+    async def get_client_with_policies(
+        self,
+        client_id: int,
+        current_user: Principal
+    ) -> Tuple[Client, List[InsurancePolicy]]:
+        return await self._run(ClientService.get_client_with_policies, client_id, current_user)
+
+    async def create_client(self, client_data: ClientCreate, current_user: Principal) -> Client:
+        return await self._write(ClientService.create_client, client_data, current_user)
+
+    async def import_clients(
+        self,
+        rows: List[ValidRow],
+        current_user: Principal
+    ) -> Tuple[int, List[BulkRowError]]:
+        return await self._write(ClientService.import_clients, rows, current_user)
+
+    async def update_client(
+        self,
+        client_id: int,
+        client_data: ClientUpdate,
+        current_user: Principal,
+        if_match: Optional[str] = None
+    ) -> Client:
+        return await self._write(ClientService.update_client, client_id, client_data, current_user, if_match)
+
+    async def delete_client(self, client_id: int, current_user: Principal) -> bool:
+        return await self._write(ClientService.delete_client, client_id, current_user)
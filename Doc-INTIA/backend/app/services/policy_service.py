@@ -1,30 +1,62 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from typing import List, Optional
+from sqlalchemy import and_, or_, insert
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from datetime import datetime
+from decimal import Decimal
 from fastapi import HTTPException, status
 
 from app.models.policy import InsurancePolicy
 from app.models.client import Client
-from app.models.user import User
-from app.schemas.policy import PolicyCreate, PolicyUpdate, PolicyResponse
-from app.core.security import check_user_access, ROLE_ADMIN
-from app.core.audit import log_action, ACTION_CREATE, ACTION_UPDATE, ACTION_DELETE, RESOURCE_POLICY
+from app.schemas.policy import PolicyCreate, PolicyUpdate, PolicyResponse, PolicyBulkStatusUpdate
+from app.schemas.bulk import BulkRowError
+from app.core.database import is_unique_violation, run_db, RequestSession
+from app.core.security import Principal, check_user_access, ROLE_ADMIN
+from app.core.pagination import fetch_with_total, estimate_count
+from app.core.http_cache import version_etag, check_if_match
+from app.core.search import policy_search_index
+from app.core.writer import run_write
+from app.core.bulk import ValidRow, BULK_CHUNK_SIZE
+from app.core.export import batched
+from app.core.result_cache import invalidate_on_commit, list_scope
+from app.core.audit import (
+    log_action, log_actions, ACTION_CREATE, ACTION_UPDATE, ACTION_DELETE, RESOURCE_POLICY
+)
+
+# Premiums are stored as Numeric(10, 2)
+PREMIUM_QUANTUM = Decimal("0.01")
+
+
+# Fields a policy list can return (the PolicyResponse fields), loaded as plain
+# rows of just those columns instead of ORM instances
+POLICY_LIST_FIELDS = tuple(PolicyResponse.model_fields)
+# Lists leave out the unbounded coverage text unless it is asked for
+POLICY_DEFAULT_FIELDS = tuple(field for field in POLICY_LIST_FIELDS if field != "coverage")
+
+
+def policy_list_columns(fields: Sequence[str]) -> list:
+    return [getattr(InsurancePolicy, field) for field in fields]
+
+
+def policy_etag(policy: InsurancePolicy) -> str:
+    """Entity tag of a policy from its row version."""
+    return version_etag("policy", policy.id, policy.updated_at)
+
 
 class PolicyService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_policies(
+    def _filtered_query(
         self,
-        current_user: User,
-        skip: int = 0,
-        limit: int = 20,
+        current_user: Principal,
         client_id: Optional[int] = None,
         status: Optional[str] = None,
         branch_id: Optional[int] = None,
         search: Optional[str] = None
-    ) -> List[InsurancePolicy]:
-        """Get policies with filtering and access control."""
+    ):
+        """Build the policy query with access control and filters applied."""
         query = self.db.query(InsurancePolicy)
 
         # Apply access control
@@ -41,8 +73,10 @@ class PolicyService:
         if status:
             query = query.filter(InsurancePolicy.status == status)
 
-        # Apply search filter
-        if search:
+        # Apply search filter, through the policy search document when possible
+        if search and policy_search_index.supports(search):
+            query = policy_search_index.filter(query, InsurancePolicy.id, search)
+        elif search:
             search_pattern = f"%{search}%"
             query = query.join(Client).filter(
                 or_(
@@ -55,48 +89,166 @@ class PolicyService:
                 )
             )
 
+        return query
+
+    def get_policies(
+        self,
+        current_user: Principal,
+        skip: int = 0,
+        limit: int = 20,
+        client_id: Optional[int] = None,
+        status: Optional[str] = None,
+        branch_id: Optional[int] = None,
+        search: Optional[str] = None,
+        fields: Sequence[str] = POLICY_DEFAULT_FIELDS
+    ) -> List[Row]:
+        """Get policies with filtering and access control, as rows of the given fields."""
+        query = self._list_query(
+            current_user,
+            client_id=client_id,
+            status=status,
+            branch_id=branch_id,
+            search=search,
+            fields=fields
+        )
         return query.offset(skip).limit(limit).all()
 
+    def get_policies_with_total(
+        self,
+        current_user: Principal,
+        skip: int = 0,
+        limit: int = 20,
+        client_id: Optional[int] = None,
+        status: Optional[str] = None,
+        branch_id: Optional[int] = None,
+        search: Optional[str] = None,
+        fields: Sequence[str] = POLICY_DEFAULT_FIELDS
+    ) -> Tuple[List[Row], int]:
+        """Get a page of policy rows and the filtered total in one query."""
+        query = self._list_query(
+            current_user,
+            client_id=client_id,
+            status=status,
+            branch_id=branch_id,
+            search=search,
+            fields=fields
+        )
+        return fetch_with_total(query, skip, limit)
+
+    def _list_query(
+        self,
+        current_user: Principal,
+        client_id: Optional[int] = None,
+        status: Optional[str] = None,
+        branch_id: Optional[int] = None,
+        search: Optional[str] = None,
+        fields: Sequence[str] = POLICY_DEFAULT_FIELDS
+    ):
+        """Filtered policy query in list order, projected to the requested fields."""
+        query = self._filtered_query(
+            current_user,
+            client_id=client_id,
+            status=status,
+            branch_id=branch_id,
+            search=search
+        )
+        if search and policy_search_index.supports(search):
+            # Most relevant matches first
+            query = query.order_by(policy_search_index.rank, InsurancePolicy.id)
+        return query.with_entities(*policy_list_columns(fields))
+
+    def get_policies_after(
+        self,
+        current_user: Principal,
+        after_id: Optional[int] = None,
+        limit: int = 20,
+        client_id: Optional[int] = None,
+        status: Optional[str] = None,
+        branch_id: Optional[int] = None,
+        search: Optional[str] = None,
+        fields: Sequence[str] = POLICY_DEFAULT_FIELDS
+    ) -> List[Row]:
+        """Get policy rows ordered by id, starting after a keyset cursor.
+
+        Fetches one extra row so the caller can tell whether a next page exists.
+        """
+        query = self._filtered_query(
+            current_user,
+            client_id=client_id,
+            status=status,
+            branch_id=branch_id,
+            search=search
+        )
+        if after_id is not None:
+            query = query.filter(InsurancePolicy.id > after_id)
+        return query.with_entities(*policy_list_columns(fields)) \
+            .order_by(InsurancePolicy.id).limit(limit + 1).all()
+
+    def export_query(
+        self,
+        current_user: Principal,
+        client_id: Optional[int] = None,
+        status: Optional[str] = None,
+        branch_id: Optional[int] = None,
+        search: Optional[str] = None,
+        fields: Sequence[str] = POLICY_DEFAULT_FIELDS
+    ):
+        """Every policy the list would show, in id order, projected to the given fields."""
+        query = self._filtered_query(
+            current_user,
+            client_id=client_id,
+            status=status,
+            branch_id=branch_id,
+            search=search
+        )
+        return query.with_entities(*policy_list_columns(fields)).order_by(InsurancePolicy.id)
+
     def get_policy_count(
         self,
-        current_user: User,
+        current_user: Principal,
         client_id: Optional[int] = None,
         status: Optional[str] = None,
         branch_id: Optional[int] = None,
         search: Optional[str] = None
     ) -> int:
         """Get total count of policies for pagination."""
-        query = self.db.query(InsurancePolicy)
-
-        # Apply access control
-        if current_user.role != ROLE_ADMIN:
-            query = query.filter(InsurancePolicy.branch_id == current_user.branch_id)
-        elif branch_id:
-            query = query.filter(InsurancePolicy.branch_id == branch_id)
-
-        # Apply filters
-        if client_id:
-            query = query.filter(InsurancePolicy.client_id == client_id)
-        if status:
-            query = query.filter(InsurancePolicy.status == status)
+        query = self._filtered_query(
+            current_user,
+            client_id=client_id,
+            status=status,
+            branch_id=branch_id,
+            search=search
+        )
+        return query.count()
 
-        # Apply search filter
-        if search:
-            search_pattern = f"%{search}%"
-            query = query.join(Client).filter(
-                or_(
-                    InsurancePolicy.policy_number.ilike(search_pattern),
-                    InsurancePolicy.type.ilike(search_pattern),
-                    InsurancePolicy.coverage.ilike(search_pattern),
-                    Client.first_name.ilike(search_pattern),
-                    Client.last_name.ilike(search_pattern),
-                    Client.email.ilike(search_pattern)
-                )
+    def get_policy_count_estimate(
+        self,
+        current_user: Principal,
+        client_id: Optional[int] = None,
+        status: Optional[str] = None,
+        branch_id: Optional[int] = None,
+        search: Optional[str] = None
+    ) -> int:
+        """Get an approximate policy count, cached per filter signature."""
+        signature = (
+            "policies",
+            list_scope(current_user, branch_id),
+            client_id,
+            status,
+            search or None
+        )
+        return estimate_count(
+            signature,
+            lambda: self.get_policy_count(
+                current_user,
+                client_id=client_id,
+                status=status,
+                branch_id=branch_id,
+                search=search
             )
+        )
 
-        return query.count()
-
-    def get_policy_by_id(self, policy_id: int, current_user: User) -> InsurancePolicy:
+    def get_policy_by_id(self, policy_id: int, current_user: Principal) -> InsurancePolicy:
         """Get a specific policy by ID with access control."""
         policy = self.db.query(InsurancePolicy).filter(InsurancePolicy.id == policy_id).first()
 
@@ -115,7 +267,27 @@ class PolicyService:
 
         return policy
 
-    def create_policy(self, policy_data: PolicyCreate, current_user: User) -> InsurancePolicy:
+    def get_policy_etag(self, policy_id: int, current_user: Principal) -> str:
+        """Entity tag of a policy from its row version, without loading it."""
+        row = self.db.query(
+            InsurancePolicy.id, InsurancePolicy.branch_id, InsurancePolicy.updated_at
+        ).filter(InsurancePolicy.id == policy_id).first()
+
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Policy not found"
+            )
+
+        if not check_user_access(current_user, branch_id=row.branch_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied to this policy"
+            )
+
+        return policy_etag(row)
+
+    def create_policy(self, policy_data: PolicyCreate, current_user: Principal) -> InsurancePolicy:
         """Create a new insurance policy."""
         # Verify client exists and get branch
         client = self.db.query(Client).filter(Client.id == policy_data.client_id).first()
@@ -132,46 +304,185 @@ class PolicyService:
                 detail="Cannot create policies for this branch"
             )
 
-        # Check for duplicate policy number
-        existing_policy = self.db.query(InsurancePolicy).filter(
-            InsurancePolicy.policy_number == policy_data.policy_number
-        ).first()
-        if existing_policy:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Policy number already exists"
-            )
-
-        # Create policy
+        # Create policy; the unique constraint on policy_number rejects duplicates
         policy_dict = policy_data.model_dump()
         policy_dict['branch_id'] = client.branch_id
         policy_dict['status'] = 'pending'  # Default status
+        policy_dict['premium'] = policy_dict['premium'].quantize(PREMIUM_QUANTUM)
 
         policy = InsurancePolicy(**policy_dict)
         self.db.add(policy)
-        self.db.commit()
-        self.db.refresh(policy)
+        self._flush()
 
-        # Log creation
+        # Log creation in the same transaction
         log_action(
             db_session=self.db,
             user_id=current_user.id,
             action=ACTION_CREATE,
             resource_type=RESOURCE_POLICY,
             resource_id=policy.id,
-            new_values=policy_dict
+            new_values=policy_dict,
+            commit=False
         )
+        self._commit()
 
         return policy
 
+    def import_policies(
+        self,
+        rows: List[ValidRow],
+        current_user: Principal
+    ) -> Tuple[int, List[BulkRowError]]:
+        """Create a chunk of validated policies with set-based checks and inserts.
+
+        Client branches are resolved in one query for the access checks, and
+        policy numbers that already exist (in the database or earlier in the
+        chunk) are rejected. Accepted policies are inserted as pending and
+        audited together; if a constraint still rejects them (a concurrent
+        write), the chunk is rolled back and each of its rows reported.
+        Returns the number created and the errors.
+        """
+        errors: List[BulkRowError] = []
+        client_ids = {policy_data.client_id for _, policy_data in rows}
+        client_branches = dict(
+            self.db.query(Client.id, Client.branch_id).filter(Client.id.in_(client_ids)).all()
+        )
+        numbers = {policy_data.policy_number for _, policy_data in rows}
+        existing_numbers = {
+            number for (number,) in self.db.query(InsurancePolicy.policy_number)
+            .filter(InsurancePolicy.policy_number.in_(numbers))
+        }
+
+        accepted, accepted_rows = [], []
+        for row_number, policy_data in rows:
+            branch_id = client_branches.get(policy_data.client_id)
+            if branch_id is None:
+                message = "Client not found"
+            elif not check_user_access(current_user, branch_id=branch_id):
+                message = "Cannot create policies for this branch"
+            elif policy_data.policy_number in existing_numbers:
+                message = "Policy number already exists"
+            elif policy_data.premium <= 0:
+                message = "premium: must be greater than 0"
+            else:
+                existing_numbers.add(policy_data.policy_number)
+                policy_dict = policy_data.model_dump()
+                policy_dict['branch_id'] = branch_id
+                policy_dict['status'] = 'pending'  # Default status
+                policy_dict['premium'] = policy_dict['premium'].quantize(PREMIUM_QUANTUM)
+                accepted.append(policy_dict)
+                accepted_rows.append((row_number, policy_data.policy_number))
+                continue
+            errors.append(BulkRowError(row=row_number, key=policy_data.policy_number, errors=[message]))
+
+        if accepted:
+            try:
+                created_ids = self.db.scalars(
+                    insert(InsurancePolicy).returning(InsurancePolicy.id, sort_by_parameter_order=True),
+                    accepted
+                ).all()
+                log_actions(
+                    db_session=self.db,
+                    user_id=current_user.id,
+                    action=ACTION_CREATE,
+                    resource_type=RESOURCE_POLICY,
+                    changes=[
+                        (policy_id, None, policy_dict)
+                        for policy_id, policy_dict in zip(created_ids, accepted)
+                    ]
+                )
+                # Bulk inserts bypass the ORM flush that tracks list cache writes
+                invalidate_on_commit(self.db, {policy_dict['branch_id'] for policy_dict in accepted})
+                self.db.commit()
+            except IntegrityError as e:
+                self.db.rollback()
+                detail = self._integrity_error_detail(e)
+                errors.extend(
+                    BulkRowError(row=row_number, key=policy_number, errors=[detail])
+                    for row_number, policy_number in accepted_rows
+                )
+                return 0, errors
+
+        return len(accepted), errors
+
+    def update_policy_statuses(
+        self,
+        update: PolicyBulkStatusUpdate,
+        current_user: Principal
+    ) -> Tuple[int, List[BulkRowError]]:
+        """Move many policies to one status with set-based UPDATEs.
+
+        Policies that don't exist or belong to another branch are reported
+        and left alone; the others change in one transaction, audited
+        together. Policies already in the target status count as done.
+        Returns the number of policies in the target status and the errors.
+        """
+        errors: List[BulkRowError] = []
+        positions = {}
+        for position, policy_id in enumerate(update.policy_ids, start=1):
+            positions.setdefault(policy_id, position)
+
+        current = {}
+        for ids in batched(positions, BULK_CHUNK_SIZE):
+            current.update(
+                (row.id, row) for row in self.db.query(
+                    InsurancePolicy.id, InsurancePolicy.branch_id, InsurancePolicy.status
+                ).filter(InsurancePolicy.id.in_(ids))
+            )
+
+        changed = []
+        done = 0
+        for policy_id, position in positions.items():
+            row = current.get(policy_id)
+            if row is None:
+                message = "Policy not found"
+            elif not check_user_access(current_user, branch_id=row.branch_id):
+                message = "Cannot update policies for this branch"
+            else:
+                done += 1
+                if row.status != update.status:
+                    changed.append(row)
+                continue
+            errors.append(BulkRowError(row=position, key=str(policy_id), errors=[message]))
+
+        if changed:
+            # The status check constraint still guards the new value
+            values = {InsurancePolicy.status: update.status, InsurancePolicy.updated_at: datetime.utcnow()}
+            try:
+                for rows in batched(changed, BULK_CHUNK_SIZE):
+                    self.db.query(InsurancePolicy) \
+                        .filter(InsurancePolicy.id.in_([row.id for row in rows])) \
+                        .update(values, synchronize_session=False)
+            except IntegrityError as e:
+                self._raise_integrity_error(e)
+            log_actions(
+                db_session=self.db,
+                user_id=current_user.id,
+                action=ACTION_UPDATE,
+                resource_type=RESOURCE_POLICY,
+                changes=[(row.id, {'status': row.status}, {'status': update.status}) for row in changed]
+            )
+            # Bulk updates bypass the ORM flush that tracks list cache writes
+            invalidate_on_commit(self.db, {row.branch_id for row in changed})
+            self._commit()
+
+        return done, errors
+
     def update_policy(
         self,
         policy_id: int,
         policy_data: PolicyUpdate,
-        current_user: User
+        current_user: Principal,
+        if_match: Optional[str] = None
     ) -> InsurancePolicy:
-        """Update an existing policy."""
+        """Update an existing policy.
+
+        With `if_match`, the update only applies if the policy still has that
+        entity tag.
+        """
         policy = self.get_policy_by_id(policy_id, current_user)
+        if if_match is not None:
+            check_if_match(if_match, policy_etag(policy), "Policy")
 
         # Check if user can update policies for this branch
         if not check_user_access(current_user, branch_id=policy.branch_id):
@@ -194,13 +505,13 @@ class PolicyService:
 
         # Update policy
         update_data = policy_data.model_dump(exclude_unset=True)
+        if update_data.get('premium') is not None:
+            update_data['premium'] = update_data['premium'].quantize(PREMIUM_QUANTUM)
         for field, value in update_data.items():
             setattr(policy, field, value)
+        self._flush()
 
-        self.db.commit()
-        self.db.refresh(policy)
-
-        # Log update
+        # Log update in the same transaction
         log_action(
             db_session=self.db,
             user_id=current_user.id,
@@ -208,12 +519,14 @@ class PolicyService:
             resource_type=RESOURCE_POLICY,
             resource_id=policy.id,
             old_values=old_values,
-            new_values=update_data
+            new_values=update_data,
+            commit=False
         )
+        self._commit()
 
         return policy
 
-    def delete_policy(self, policy_id: int, current_user: User) -> bool:
+    def delete_policy(self, policy_id: int, current_user: Principal) -> bool:
         """Delete a policy."""
         policy = self.get_policy_by_id(policy_id, current_user)
 
@@ -236,18 +549,115 @@ class PolicyService:
             'status': policy.status
         }
 
-        # Delete policy
+        # Delete policy and log deletion in one transaction
         self.db.delete(policy)
-        self.db.commit()
-
-        # Log deletion
         log_action(
             db_session=self.db,
             user_id=current_user.id,
             action=ACTION_DELETE,
             resource_type=RESOURCE_POLICY,
             resource_id=policy_id,
-            old_values=old_values
+            old_values=old_values,
+            commit=False
         )
+        self._commit()
 
         return True
+
+    def _flush(self) -> None:
+        """Flush pending changes, mapping constraint violations to HTTP errors."""
+        try:
+            self.db.flush()
+        except IntegrityError as e:
+            self._raise_integrity_error(e)
+
+    def _commit(self) -> None:
+        """Commit the unit of work, mapping constraint violations to HTTP errors."""
+        try:
+            self.db.commit()
+        except IntegrityError as e:
+            self._raise_integrity_error(e)
+
+    def _integrity_error_detail(self, error: IntegrityError) -> str:
+        if is_unique_violation(error, "insurance_policies", "policy_number"):
+            return "Policy number already exists"
+        return "Policy violates a database constraint"
+
+    def _raise_integrity_error(self, error: IntegrityError) -> None:
+        self.db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=self._integrity_error_detail(error)
+        )
+
+
+
+class AsyncPolicyService:
+    """Awaitable PolicyService for async endpoints.
+
+    Business rules stay in PolicyService; each call runs it through run_db,
+    on the async driver or on the threadpool depending on DATABASE_ASYNC.
+    Writes go through the SQLite write queue when it is running.
+    """
+
+    def __init__(self, db: RequestSession):
+        self.db = db
+
+    async def _run(self, method: Callable[..., Any], *args, **kwargs):
+        # `method` is an unbound PolicyService method, bound to a service on the session
+        return await run_db(self.db, lambda session: method(PolicyService(session), *args, **kwargs))
+
+    async def _write(self, method: Callable[..., Any], *args, **kwargs):
+        return await run_write(self.db, lambda session: method(PolicyService(session), *args, **kwargs))
+
+    async def get_policies(self, current_user: Principal, **filters) -> List[Row]:
+        return await self._run(PolicyService.get_policies, current_user, **filters)
+
+    async def get_policies_with_total(
+        self, current_user: Principal, **filters
+    ) -> Tuple[List[Row], int]:
+        return await self._run(PolicyService.get_policies_with_total, current_user, **filters)
+
+    async def get_policies_after(self, current_user: Principal, **filters) -> List[Row]:
+        return await self._run(PolicyService.get_policies_after, current_user, **filters)
+
+    async def get_policy_count(self, current_user: Principal, **filters) -> int:
+        return await self._run(PolicyService.get_policy_count, current_user, **filters)
+
+    async def get_policy_count_estimate(self, current_user: Principal, **filters) -> int:
+        return await self._run(PolicyService.get_policy_count_estimate, current_user, **filters)
+
+    async def get_policy_by_id(self, policy_id: int, current_user: Principal) -> InsurancePolicy:
+        return await self._run(PolicyService.get_policy_by_id, policy_id, current_user)
+
+    async def get_policy_etag(self, policy_id: int, current_user: Principal) -> str:
+        return await self._run(PolicyService.get_policy_etag, policy_id, current_user)
+
+    async def create_policy(self, policy_data: PolicyCreate, current_user: Principal) -> InsurancePolicy:
+        return await self._write(PolicyService.create_policy, policy_data, current_user)
+
+    async def import_policies(
+        self,
+        rows: List[ValidRow],
+        current_user: Principal
+    ) -> Tuple[int, List[BulkRowError]]:
+        return await self._write(PolicyService.import_policies, rows, current_user)
+
+    async def update_policy_statuses(
+        self,
+        update: PolicyBulkStatusUpdate,
+        current_user: Principal
+    ) -> Tuple[int, List[BulkRowError]]:
+        return await self._write(PolicyService.update_policy_statuses, update, current_user)
+
+    async def update_policy(
+        self,
+        policy_id: int,
+        policy_data: PolicyUpdate,
+        current_user: Principal,
+        if_match: Optional[str] = None
+    ) -> InsurancePolicy:
+        return await self._write(PolicyService.update_policy, policy_id, policy_data, current_user, if_match)
+
+    async def delete_policy(self, policy_id: int, current_user: Principal) -> bool:
+        return await self._write(PolicyService.delete_policy, policy_id, current_user)
@@ -1,27 +1,17 @@
 """Initialize database with seed data."""
-import bcrypt
 from datetime import date
 from sqlalchemy.orm import Session
 
-from app.core.database import Base, engine, SessionLocal
+from app.core.database import engine, SessionLocal
+from app.core.migrations import upgrade_database
+from app.core.search import ensure_search_indexes
+from app.core.passwords import hash_password, verify_password
 from app.models.user import User
 from app.models.branch import Branch
 from app.models.client import Client
 from app.models.policy import InsurancePolicy
 
 
-def get_password_hash(password: str) -> str:
-    """Hash a password using bcrypt."""
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against a hash."""
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
-
-
 def seed_branches(db: Session):
     """Seed branches (succursales)."""
     branches_data = [
@@ -107,7 +97,7 @@ def seed_users(db: Session):
     updated_count = 0
     for user_data in users_data:
         existing = db.query(User).filter(User.username == user_data["username"]).first()
-        password_hash = get_password_hash(user_data["password"])
+        password_hash = hash_password(user_data["password"])
         
         if not existing:
             user = User(
@@ -271,10 +261,11 @@ def seed_clients_and_policies(db: Session):
 
 def init_db():
     """Initialize database tables and seed all data."""
-    # Create all tables
-    print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    print("✓ Database tables created\n")
+    # Create or upgrade all tables
+    print("Migrating database schema...")
+    upgrade_database(engine)
+    ensure_search_indexes(engine)
+    print("✓ Database schema up to date\n")
 
     db: Session = SessionLocal()
     try:
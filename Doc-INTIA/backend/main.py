@@ -1,28 +1,61 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 
-from app.core.database import engine, get_db, Base
-from app.core.security import get_current_user
+from app.core.database import (
+    engine, async_engine, read_engine, async_read_engine, DATABASE_READ_URL, get_db
+)
+from app.core.migrations import upgrade_database
+from app.core.search import ensure_search_indexes
+from app.core.metrics import pool_metrics
+from app.core.serialization import default_response_class
+from app.core.writer import write_queue, write_queue_supported
+from app.core.replica import replica_sync
+from app.core.reference import branch_cache
+from app.core.expiry import policy_expiry
+from app.core.audit import audit_writer, AUDIT_WRITER_MODE, AUDIT_MODE_ASYNC
+from app.core.security import get_current_user, Principal, ROLE_ADMIN
 from app.api.v1.api import api_router
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Bring the schema up to date
+upgrade_database(engine)
+ensure_search_indexes(engine)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("Starting INTIA Assurance API server...")
+    if write_queue_supported():
+        write_queue.start()
+    if AUDIT_WRITER_MODE == AUDIT_MODE_ASYNC:
+        audit_writer.start()
+    replica_sync.start()
+    # Warm the reference data cache
+    await asyncio.to_thread(branch_cache.load)
+    policy_expiry.start()
     yield
     # Shutdown
     print("Shutting down INTIA Assurance API server...")
+    # Finish the expiry chunk in progress while the writers are still up
+    await asyncio.to_thread(policy_expiry.stop)
+    # Drain queued audit rows before the process exits
+    await asyncio.to_thread(audit_writer.stop)
+    # Then commit the writes still queued for SQLite
+    await asyncio.to_thread(write_queue.stop)
+    await asyncio.to_thread(replica_sync.stop)
+    if async_engine is not None:
+        await async_engine.dispose()
+    if DATABASE_READ_URL and async_read_engine is not None:
+        await async_read_engine.dispose()
 
 # Create FastAPI application
 app = FastAPI(
     title="INTIA Assurance Management API",
     description="REST API for managing clients, insurance policies, and users across INTIA branches",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=default_response_class()
 )
 
 # CORS middleware
@@ -47,3 +80,30 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "timestamp": "2025-11-18T00:00:00Z"}
+
+def require_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
+    # Metrics expose server internals: ADMIN users only
+    if current_user.role != ROLE_ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can access metrics"
+        )
+    return current_user
+
+# Connection pool metrics (checkout wait times, utilization) and write queue counters
+@app.get("/metrics/database", dependencies=[Depends(require_admin)])
+async def database_metrics():
+    metrics = {"sync": pool_metrics(engine)}
+    if async_engine is not None:
+        metrics["async"] = pool_metrics(async_engine.sync_engine)
+    if DATABASE_READ_URL:
+        metrics["read"] = pool_metrics(read_engine)
+        if async_read_engine is not None:
+            metrics["async_read"] = pool_metrics(async_read_engine.sync_engine)
+    metrics["write_queue"] = write_queue.snapshot()
+    return metrics
+
+# Background job progress and timings
+@app.get("/metrics/jobs", dependencies=[Depends(require_admin)])
+async def job_metrics():
+    return {"policy_expiry": policy_expiry.snapshot()}
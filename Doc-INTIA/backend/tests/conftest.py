@@ -0,0 +1,34 @@
+"""API tests run against a seeded SQLite database in a temporary directory."""
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Settings are read at import time, so point them at the test database first
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ.setdefault("ADMIN_PASSWORD", "ChangeMe123!")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import init_db  # noqa: E402
+import main  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    init_db.init_db()
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "admin", "password": os.environ["ADMIN_PASSWORD"]}
+    )
+    assert response.status_code == 200, response.text
+    client.cookies.clear()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
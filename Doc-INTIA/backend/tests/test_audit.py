@@ -0,0 +1,33 @@
+import time
+
+
+def test_login_is_audited_through_the_writer(client, admin_headers):
+    deadline = time.monotonic() + 5
+    while True:
+        response = client.get(
+            "/api/v1/audit-logs/", params={"action": "LOGIN"}, headers=admin_headers
+        )
+        assert response.status_code == 200, response.text
+        if response.json()["data"] or time.monotonic() > deadline:
+            break
+        time.sleep(0.1)
+
+    assert response.json()["data"][0]["resource_type"] == "user"
+
+
+def test_audit_detail_returns_the_values_left_out_of_the_list(client, admin_headers):
+    created = client.post("/api/v1/clients/", headers=admin_headers, json={
+        "branch_id": 1, "first_name": "Awa", "last_name": "Audit",
+        "email": "awa.audit@example.com", "phone": "+237 6 00 00 00 01", "address": "Yaoundé"
+    })
+    assert created.status_code in (200, 201), created.text
+    listed = client.get(
+        "/api/v1/audit-logs/",
+        params={"resource_type": "client", "resource_id": created.json()["id"]},
+        headers=admin_headers
+    ).json()["data"]
+    assert "new_values" not in listed[0]
+
+    detail = client.get(f"/api/v1/audit-logs/{listed[0]['id']}", headers=admin_headers)
+    assert detail.status_code == 200, detail.text
+    assert detail.json()["new_values"]["email"] == "awa.audit@example.com"
@@ -0,0 +1,47 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+from app.core.database import SessionLocal
+from app.core.security import REFRESH_TOKEN_BODY_HEADER, as_utc, hash_refresh_token
+from app.models.refresh_token import RefreshToken
+
+
+def header_login(client) -> str:
+    """Log in as a cookie-less client and return its refresh token."""
+    response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "admin", "password": os.environ["ADMIN_PASSWORD"]},
+        headers={REFRESH_TOKEN_BODY_HEADER: "true"}
+    )
+    assert response.status_code == 200, response.text
+    client.cookies.clear()
+    return response.json()["refresh_token"]
+
+
+def test_logout_revokes_a_header_refresh_token(client):
+    refresh_token = header_login(client)
+    bearer = {"Authorization": f"Bearer {refresh_token}"}
+
+    assert client.post("/api/v1/auth/logout", headers=bearer).status_code == 200
+    assert client.post("/api/v1/auth/refresh", headers=bearer).status_code == 401
+
+
+def test_refresh_rejects_an_expired_token(client):
+    refresh_token = header_login(client)
+    db = SessionLocal()
+    try:
+        db.query(RefreshToken).filter(
+            RefreshToken.token_hash == hash_refresh_token(refresh_token)
+        ).update({RefreshToken.expires_at: datetime.now(timezone.utc) - timedelta(minutes=1)})
+        db.commit()
+    finally:
+        db.close()
+
+    response = client.post("/api/v1/auth/refresh", headers={"Authorization": f"Bearer {refresh_token}"})
+    assert response.status_code == 401
+
+
+def test_as_utc_accepts_naive_and_aware_values():
+    naive = datetime(2024, 1, 1, 12, 0)
+    aware = datetime(2024, 1, 1, 13, 0, tzinfo=timezone(timedelta(hours=1)))
+    assert as_utc(naive) == as_utc(aware) == datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
@@ -0,0 +1,20 @@
+import pytest
+
+
+@pytest.mark.parametrize("resource,update", [
+    ("clients", {"phone": "+237 6 00 00 00 00"}),
+    ("policies", {"coverage": "Tous risques"}),
+])
+def test_if_match_uses_strong_comparison(client, admin_headers, resource, update):
+    item_id = client.get(f"/api/v1/{resource}/", headers=admin_headers).json()["data"][0]["id"]
+    etag = client.get(f"/api/v1/{resource}/{item_id}", headers=admin_headers).headers["ETag"]
+
+    weak = client.put(
+        f"/api/v1/{resource}/{item_id}", json=update, headers={**admin_headers, "If-Match": f"W/{etag}"}
+    )
+    assert weak.status_code == 412
+
+    strong = client.put(
+        f"/api/v1/{resource}/{item_id}", json=update, headers={**admin_headers, "If-Match": etag}
+    )
+    assert strong.status_code == 200, strong.text
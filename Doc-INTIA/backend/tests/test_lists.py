@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.mark.parametrize("resource", ["clients", "policies"])
+def test_list_with_only_id_field(client, admin_headers, resource):
+    response = client.get(f"/api/v1/{resource}/", params={"fields": "id"}, headers=admin_headers)
+
+    assert response.status_code == 200, response.text
+    items = response.json()["data"]
+    assert items
+    assert all(set(item) == {"id"} for item in items)
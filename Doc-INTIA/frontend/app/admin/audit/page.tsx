@@ -12,6 +12,7 @@ import {
   SelectValue,
 } from '@/components/ui/select'
 import { Input } from '@/components/ui/input'
+import { Button } from '@/components/ui/button'
 import { auditApi } from '@/lib/api'
 
 interface AuditLog {
@@ -32,6 +33,8 @@ export default function AdminAuditPage() {
   const [loading, setLoading] = useState(true)
   const [actionFilter, setActionFilter] = useState<string>('all')
   const [resourceFilter, setResourceFilter] = useState<string>('all')
+  // Old/new values, loaded from the detail endpoint when a log is expanded
+  const [changes, setChanges] = useState<Record<number, AuditLog>>({})
 
   useEffect(() => {
     fetchAuditLogs()
@@ -44,7 +47,9 @@ export default function AdminAuditPage() {
         skip: 0,
         limit: 50,
         ...(action !== 'all' && { action }),
-        ...(resource !== 'all' && { resource_type: resource })
+        ...(resource !== 'all' && { resource_type: resource }),
+        // old/new values are left out of the list and loaded per log on demand
+        fields: ['user_id', 'action', 'resource_type', 'resource_id', 'timestamp', 'ip_address']
       })
       setLogs(data.data || [])
     } catch (err) {
@@ -54,6 +59,23 @@ export default function AdminAuditPage() {
     }
   }
 
+  const toggleChanges = async (id: number) => {
+    if (changes[id]) {
+      setChanges((current) => {
+        const next = { ...current }
+        delete next[id]
+        return next
+      })
+      return
+    }
+    try {
+      const log = await auditApi.getById(id) as AuditLog
+      setChanges((current) => ({ ...current, [id]: log }))
+    } catch (err) {
+      console.error('Failed to fetch audit log:', err)
+    }
+  }
+
   const getActionIcon = (action: string) => {
     switch (action) {
       case 'CREATE':
@@ -176,19 +198,29 @@ export default function AdminAuditPage() {
                   </div>
                 )}
               </div>
-              {log.old_values && (
+              {['CREATE', 'UPDATE', 'DELETE'].includes(log.action) && (
+                <Button
+                  variant="outline"
+                  size="sm"
+                  className="mt-4"
+                  onClick={() => toggleChanges(log.id)}
+                >
+                  {changes[log.id] ? 'Hide changes' : 'Show changes'}
+                </Button>
+              )}
+              {changes[log.id]?.old_values && (
                 <div className="mt-4 p-3 bg-gray-50 rounded text-xs">
                   <p className="font-semibold mb-1">Old Values:</p>
                   <pre className="whitespace-pre-wrap">
-                    {JSON.stringify(log.old_values, null, 2)}
+                    {JSON.stringify(changes[log.id].old_values, null, 2)}
                   </pre>
                 </div>
               )}
-              {log.new_values && (
+              {changes[log.id]?.new_values && (
                 <div className="mt-2 p-3 bg-blue-50 rounded text-xs">
                   <p className="font-semibold mb-1">New Values:</p>
                   <pre className="whitespace-pre-wrap">
-                    {JSON.stringify(log.new_values, null, 2)}
+                    {JSON.stringify(changes[log.id].new_values, null, 2)}
                   </pre>
                 </div>
               )}
@@ -33,7 +33,7 @@ interface Policy {
   client_id: number
   branch_id: number
   type: string
-  coverage: string
+  coverage?: string
   premium: number
   start_date: string
   end_date: string
@@ -61,6 +61,8 @@ export default function PoliciesPage() {
   const [statusFilter, setStatusFilter] = useState<string>('all')
   const [meta, setMeta] = useState<PaginationMeta | null>(null)
   const [error, setError] = useState<string | null>(null)
+  // Coverage texts, loaded from the detail endpoint when a policy is expanded
+  const [coverages, setCoverages] = useState<Record<number, string>>({})
   const searchInputRef = useRef<HTMLInputElement>(null)
   const hadFocusRef = useRef(false)
 
@@ -77,7 +79,8 @@ export default function PoliciesPage() {
         skip,
         limit,
         ...(status !== 'all' && { status }),
-        ...(searchQuery && { search: searchQuery })
+        ...(searchQuery && { search: searchQuery }),
+        // coverage is left out of the list and loaded per policy on demand
       })
       
       setPolicies(data.data)
@@ -130,6 +133,23 @@ export default function PoliciesPage() {
     // Don't fetch immediately - let the debounce effect handle it
   }
 
+  const toggleCoverage = async (policyId: number) => {
+    if (policyId in coverages) {
+      setCoverages((current) => {
+        const next = { ...current }
+        delete next[policyId]
+        return next
+      })
+      return
+    }
+    try {
+      const policy = await policiesApi.getById(policyId) as Policy
+      setCoverages((current) => ({ ...current, [policyId]: policy.coverage ?? '' }))
+    } catch (err) {
+      setError(err instanceof Error ? err.message : 'An error occurred')
+    }
+  }
+
   const handleDelete = async (policyId: number) => {
     try {
       await policiesApi.delete(policyId)
@@ -257,10 +277,20 @@ export default function PoliciesPage() {
               </div>
             </CardHeader>
             <CardContent>
-              <p className="text-sm text-gray-600 mb-2">{policy.coverage}</p>
+              {policy.id in coverages && (
+                <p className="text-sm text-gray-600 mb-2">{coverages[policy.id]}</p>
+              )}
               <p className="text-sm text-gray-500">
                 Valid from {new Date(policy.start_date).toLocaleDateString()} to {new Date(policy.end_date).toLocaleDateString()}
               </p>
+              <Button
+                variant="link"
+                size="sm"
+                className="px-0"
+                onClick={() => toggleCoverage(policy.id)}
+              >
+                {policy.id in coverages ? 'Hide coverage' : 'Show coverage'}
+              </Button>
             </CardContent>
           </Card>
         ))}
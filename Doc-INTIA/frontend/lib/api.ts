@@ -10,9 +10,28 @@ export interface ApiResponse<T> {
   }
 }
 
+// Single in-flight refresh shared by every request that hit a 401
+let refreshPromise: Promise<boolean> | null = null
+
+async function refreshSession(): Promise<boolean> {
+  if (!refreshPromise) {
+    refreshPromise = fetch(`${API_URL}/api/v1/auth/refresh`, {
+      method: 'POST',
+      credentials: 'include',
+    })
+      .then((response) => response.ok)
+      .catch(() => false)
+      .finally(() => {
+        refreshPromise = null
+      })
+  }
+  return refreshPromise
+}
+
 async function apiRequest<T>(
   endpoint: string,
-  options: RequestInit = {}
+  options: RequestInit = {},
+  retryOnUnauthorized = true
 ): Promise<T> {
   // Don't set Content-Type for FormData
   const isFormData = options.body instanceof FormData
@@ -27,6 +46,15 @@ async function apiRequest<T>(
     headers,
   })
 
+  // Renew an expired access token once, then replay the request
+  const isTokenEndpoint = ['/api/v1/auth/login', '/api/v1/auth/refresh', '/api/v1/auth/logout']
+    .includes(endpoint)
+  if (response.status === 401 && retryOnUnauthorized && !isTokenEndpoint) {
+    if (await refreshSession()) {
+      return apiRequest<T>(endpoint, options, false)
+    }
+  }
+
   if (!response.ok) {
     const error = await response.json().catch(() => ({ detail: 'An error occurred' }))
     // If unauthorized, redirect to login
@@ -79,12 +107,13 @@ export const authApi = {
 
 // Clients API
 export const clientsApi = {
-  getAll: async (params?: { skip?: number; limit?: number; search?: string; branch_id?: number }) => {
+  getAll: async (params?: { skip?: number; limit?: number; search?: string; branch_id?: number; expand?: 'policies' }) => {
     const queryParams = new URLSearchParams()
     if (params?.skip !== undefined) queryParams.append('skip', params.skip.toString())
     if (params?.limit !== undefined) queryParams.append('limit', params.limit.toString())
     if (params?.search) queryParams.append('search', params.search)
     if (params?.branch_id) queryParams.append('branch_id', params.branch_id.toString())
+    if (params?.expand) queryParams.append('expand', params.expand)
     
     const query = queryParams.toString()
     return apiRequest<ApiResponse<any[]>>(`/api/v1/clients${query ? `?${query}` : ''}`)
@@ -117,7 +146,7 @@ export const clientsApi = {
 
 // Policies API
 export const policiesApi = {
-  getAll: async (params?: { skip?: number; limit?: number; client_id?: number; status?: string; branch_id?: number; search?: string }) => {
+  getAll: async (params?: { skip?: number; limit?: number; client_id?: number; status?: string; branch_id?: number; search?: string; fields?: string[] }) => {
     const queryParams = new URLSearchParams()
     if (params?.skip !== undefined) queryParams.append('skip', params.skip.toString())
     if (params?.limit !== undefined) queryParams.append('limit', params.limit.toString())
@@ -125,6 +154,7 @@ export const policiesApi = {
     if (params?.status) queryParams.append('status', params.status)
     if (params?.branch_id) queryParams.append('branch_id', params.branch_id.toString())
     if (params?.search) queryParams.append('search', params.search)
+    if (params?.fields?.length) queryParams.append('fields', params.fields.join(','))
     
     const query = queryParams.toString()
     return apiRequest<ApiResponse<any[]>>(`/api/v1/policies${query ? `?${query}` : ''}`)
@@ -179,15 +209,20 @@ export const usersApi = {
 
 // Audit Logs API (Admin only)
 export const auditApi = {
-  getAll: async (params?: { skip?: number; limit?: number; user_id?: number; action?: string; resource_type?: string }) => {
+  getAll: async (params?: { skip?: number; limit?: number; user_id?: number; action?: string; resource_type?: string; fields?: string[] }) => {
     const queryParams = new URLSearchParams()
     if (params?.skip !== undefined) queryParams.append('skip', params.skip.toString())
     if (params?.limit !== undefined) queryParams.append('limit', params.limit.toString())
     if (params?.user_id) queryParams.append('user_id', params.user_id.toString())
     if (params?.action) queryParams.append('action', params.action)
     if (params?.resource_type) queryParams.append('resource_type', params.resource_type)
+    if (params?.fields?.length) queryParams.append('fields', params.fields.join(','))
     
     const query = queryParams.toString()
     return apiRequest<ApiResponse<any[]>>(`/api/v1/audit-logs${query ? `?${query}` : ''}`)
   },
+
+  getById: async (id: number) => {
+    return apiRequest(`/api/v1/audit-logs/${id}`)
+  },
 }